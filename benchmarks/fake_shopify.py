@@ -0,0 +1,268 @@
+## ProductScrape/benchmarks/fake_shopify.py
+# Usage: python -m benchmarks.fake_shopify [--port 8765] [--products 100000] [--latency 0.02] [--throttle-rate 0.01]
+# Serves a fake Shopify store plus the reviews.io timeline on one local port, for offline benchmarks.
+
+import argparse
+import asyncio
+import os
+import random
+import zlib
+from datetime import datetime, timedelta
+from aiohttp import web
+
+# ? The helpers below import src.utils, whose logger truncates data/scrape_log.json; keep the scraper's log intact
+os.environ.setdefault("SCRAPE_LOG_FILE", "fake_shopify_log.json")
+from benchmarks.parser_cache import load_corpus
+from benchmarks.memory import synthetic_product
+
+MAX_LIMIT = 250  # * Shopify's page size cap
+DEFAULT_LIMIT = 30  # * Shopify's page size when no limit is passed
+SITEMAP_SIZE = 5000  # * Product URLs per sitemap_products_N.xml, as Shopify splits them
+NEWEST_REVIEW = datetime(2024, 12, 31, 12, 0, 0)
+
+
+# * Turn a saved product.json back into the listing shape products.json returns
+def listing_from_saved(saved):
+    return {
+        "id": saved.get("id"),
+        "handle": saved.get("handle"),
+        "title": saved.get("title"),
+        "vendor": saved.get("vendor"),
+        "product_type": saved.get("product_type"),
+        "tags": saved.get("tags") or [],
+        "body_html": f"<p>{saved.get('description') or ''}</p>",
+        "created_at": saved.get("created_at"),
+        "updated_at": saved.get("updated_at"),
+        "variants": saved.get("variants") or [],
+        "images": [
+            image.get("src") if isinstance(image.get("src"), dict) else image
+            for image in (saved.get("images") or []) if isinstance(image, dict)
+        ],
+    }
+
+
+# * Catalog of `size` products generated on demand from the seed corpus (nothing held per product).
+# * Product i is a copy of seed i % len(seeds) with a unique handle, id and SKUs.
+class Catalog:
+    def __init__(self, seeds, size, collections=20, overlap=0.1, sparse_rate=0.0, shared_sku_rate=0.0,
+                 missing_sku_rate=0.0):
+        self.seeds = seeds
+        self.size = size
+        self.collection_count = max(1, collections)
+        self.overlap = overlap  # * Fraction of products also listed in the next collection
+        self.sparse_rate = sparse_rate  # * Fraction of listings without images (forces enrichment requests)
+        self.shared_sku_rate = shared_sku_rate  # * Fraction of products reusing the previous product's SKUs
+        self.missing_sku_rate = missing_sku_rate  # * Fraction of products whose variants have no SKU
+
+    def _fraction(self, index, salt):
+        return (zlib.crc32(f"{salt}:{index}".encode()) % 10000) / 10000
+
+    def product(self, index, listing=True):
+        seed = self.seeds[index % len(self.seeds)]
+        handle = f"{seed['handle']}-{index}"
+        product = dict(seed, id=index + 1, handle=handle, title=f"{seed['title']} #{index}")
+        sku_index = index - 1 if index and self._fraction(index, "shared") < self.shared_sku_rate else index
+        missing_sku = self._fraction(index, "nosku") < self.missing_sku_rate
+        product["variants"] = [
+            dict(variant, id=(index + 1) * 100 + position,
+                 sku=None if missing_sku else f"{variant.get('sku') or 'SKU'}-{sku_index}")
+            for position, variant in enumerate(seed.get("variants") or [])
+        ]
+        if listing and self._fraction(index, "sparse") < self.sparse_rate:
+            product.pop("images", None)
+        return product
+
+    def collections(self):
+        return [{"handle": f"collection-{c}", "title": f"Collection {c}"} for c in range(self.collection_count)]
+
+    def collection_members(self, collection, start, stop):
+        # * Members of collection c: products with i % C == c, plus the overlap share of collection c-1
+        members = []
+        previous = (collection - 1) % self.collection_count
+        k = 0
+        while len(members) < stop and (k * self.collection_count) < self.size:
+            own = collection + k * self.collection_count
+            if own < self.size:
+                members.append(own)
+            shared = previous + k * self.collection_count
+            if shared < self.size and self.collection_count > 1 and self._fraction(shared, "overlap") < self.overlap:
+                members.append(shared)
+            k += 1
+        return members[start:stop]
+
+    # * Handles end in "-<index>", so no per-product state is needed to resolve them
+    def index_of(self, handle):
+        try:
+            return int(handle.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return None
+
+
+# * aiohttp app emulating the endpoints the scrapers call, with latency/throttle/error knobs
+class FakeShopify:
+    def __init__(self, catalog, reviews_per_product=3, latency=0.0, throttle_rate=0.0, error_rate=0.0,
+                 retry_after=1, seed=0, listing_cap=None, review_page_size=100):
+        self.catalog = catalog
+        self.listing_cap = listing_cap  # * products.json stops after this many products; the sitemap still has all
+        self.reviews_per_product = reviews_per_product
+        self.review_page_size = review_page_size  # * Cap on per_page, like the real API
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "by_endpoint": {}}
+
+    def app(self):
+        app = web.Application(middlewares=[self.faults])
+        app.router.add_get("/collections.json", self.collections)
+        app.router.add_get("/collections/{handle}/products.json", self.collection_products)
+        app.router.add_get("/products.json", self.products)
+        app.router.add_get("/products/{handle}/reviews.json", self.product_json)
+        app.router.add_get("/products/{handle}.json", self.product_json)
+        app.router.add_get("/sitemap.xml", self.sitemap_index)
+        app.router.add_get("/sitemap_products_{number}.xml", self.sitemap_products)
+        app.router.add_get("/timeline/data", self.timeline)
+        app.router.add_get("/__stats", self.stats_handler)
+        return app
+
+    @web.middleware
+    async def faults(self, request, handler):
+        if request.path == "/__stats":
+            return await handler(request)
+        self.stats["requests"] += 1
+        endpoint = request.match_info.route.resource.canonical if request.match_info.route.resource else request.path
+        self.stats["by_endpoint"][endpoint] = self.stats["by_endpoint"].get(endpoint, 0) + 1
+        if self.latency:
+            await asyncio.sleep(self.latency * self.random.uniform(0.5, 1.5))
+        roll = self.random.random()
+        if roll < self.throttle_rate:
+            self.stats["throttled"] += 1
+            return web.json_response({"errors": "Exceeded 2 calls per second"}, status=429,
+                                     headers={"Retry-After": str(self.retry_after)})
+        if roll < self.throttle_rate + self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"errors": "Internal Server Error"}, status=500)
+        return await handler(request)
+
+    def _page(self, request):
+        page = max(1, int(request.query.get("page", 1)))
+        limit = min(MAX_LIMIT, max(1, int(request.query.get("limit", DEFAULT_LIMIT))))
+        return (page - 1) * limit, page * limit
+
+    async def collections(self, request):
+        start, stop = self._page(request)
+        return web.json_response({"collections": self.catalog.collections()[start:stop]})
+
+    async def collection_products(self, request):
+        try:
+            collection = int(request.match_info["handle"].rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            return web.json_response({"products": []})
+        start, stop = self._page(request)
+        members = self.catalog.collection_members(collection, start, stop)
+        return web.json_response({"products": [self.catalog.product(i) for i in members]})
+
+    async def products(self, request):
+        start, stop = self._page(request)
+        indexes = range(start, min(stop, self.catalog.size, self.listing_cap or self.catalog.size))
+        return web.json_response({"products": [self.catalog.product(i) for i in indexes]})
+
+    async def product_json(self, request):
+        index = self.catalog.index_of(request.match_info["handle"])
+        if index is None or index >= self.catalog.size:
+            return web.json_response({"errors": "Not Found"}, status=404)
+        return web.json_response({"product": self.catalog.product(index, listing=False)})
+
+    def _xml(self, tag, locs):
+        body = "".join(f"<{tag}><loc>{loc}</loc></{tag}>" for loc in locs)
+        wrapper = "sitemapindex" if tag == "sitemap" else "urlset"
+        return web.Response(
+            text=f'<?xml version="1.0" encoding="UTF-8"?><{wrapper} xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{body}</{wrapper}>',
+            content_type="application/xml",
+        )
+
+    async def sitemap_index(self, request):
+        files = (self.catalog.size + SITEMAP_SIZE - 1) // SITEMAP_SIZE
+        return self._xml("sitemap", (f"{request.url.origin()}/sitemap_products_{n}.xml?from=1" for n in range(1, files + 1)))
+
+    async def sitemap_products(self, request):
+        number = int(request.match_info["number"])
+        indexes = range((number - 1) * SITEMAP_SIZE, min(number * SITEMAP_SIZE, self.catalog.size))
+        origin = request.url.origin()
+        return self._xml("url", (f"{origin}/products/{self.catalog.product(i)['handle']}" for i in indexes))
+
+    async def timeline(self, request):
+        page = int(request.query.get("page", 1))
+        sku = request.query.get("sku") or ""
+        try:
+            index = int(sku.rsplit("-", 1)[1])
+        except (IndexError, ValueError):
+            index = None
+        if index is None:
+            return web.json_response({"timeline": []})
+        size = min(self.review_page_size, int(request.query.get("per_page", self.review_page_size)))
+        # * Newest first (sort=date_desc), one hour apart
+        numbers = range((page - 1) * size, min(page * size, self.reviews_per_product))
+        return web.json_response({"timeline": [
+            {"_source": {
+                "author": f"Customer {index}-{n}",
+                "rating": 1 + (index + n) % 5,
+                "comments": f"<p>Review {n} of product {index}: <b>great</b> value &amp; fast delivery.</p>",
+                "product_name": f"Product {index}",
+                "date_created": (NEWEST_REVIEW - timedelta(hours=n)).strftime("%Y-%m-%d %H:%M:%S"),
+                "sku": sku,
+                "order_id": f"{index}-{n}",
+                "source": "benchmark",
+            }}
+            for n in numbers
+        ]})
+
+    async def stats_handler(self, request):
+        return web.json_response(self.stats)
+
+
+def load_seeds(products_dir):
+    seeds = [listing_from_saved(saved) for saved in load_corpus(products_dir)]
+    return seeds or [synthetic_product(0)]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake Shopify + reviews.io server for offline benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--products-dir", default="data/Products", help="Seed corpus (synthetic products if empty)")
+    parser.add_argument("--products", type=int, default=None, help="Catalog size (default: corpus size)")
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=0.1, help="Fraction of products listed in two collections")
+    parser.add_argument("--sparse-rate", type=float, default=0.0, help="Fraction of listings missing images")
+    parser.add_argument("--reviews-per-product", type=int, default=3)
+    parser.add_argument("--review-page-size", type=int, default=100, help="Cap on the timeline's per_page")
+    parser.add_argument("--shared-sku-rate", type=float, default=0.0, help="Fraction of products sharing a SKU")
+    parser.add_argument("--missing-sku-rate", type=float, default=0.0, help="Fraction of products without SKUs")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean response delay in seconds")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of requests answered with 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--listing-cap", type=int, default=None, help="products.json returns at most this many products")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def build_server(args):
+    seeds = load_seeds(args.products_dir)
+    catalog = Catalog(seeds, args.products or len(seeds), args.collections, args.overlap, args.sparse_rate,
+                      args.shared_sku_rate, args.missing_sku_rate)
+    return FakeShopify(catalog, args.reviews_per_product, args.latency, args.throttle_rate, args.error_rate,
+                       args.retry_after, args.seed, args.listing_cap, args.review_page_size)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    server = build_server(args)
+    print(f"Serving {server.catalog.size} products on http://{args.host}:{args.port}", flush=True)
+    web.run_app(server.app(), host=args.host, port=args.port, print=None, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+## ProductScrape/benchmarks/memory.py
+# Usage: python -m benchmarks.memory [--sizes 1000,5000,20000] [--full-records]
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from urllib.parse import urlparse, parse_qs
+from timeit import default_timer as timer
+from src.client import HTTPClient, StaticTransport
+from src.ratelimit import HostRateLimiter
+import src.product
+from src.product import ProductInfoScraper
+
+STORE_URL = "https://bench.myshopify.com"
+PAGE_SIZE = 250
+
+
+# * Realistic-sized product: long HTML description, a few variants and images
+def synthetic_product(index):
+    return {
+        "id": index,
+        "handle": f"product-{index}",
+        "title": f"Product {index}",
+        "vendor": "Bench Vendor",
+        "product_type": "Widgets",
+        "tags": ["bench", f"tag-{index % 50}"],
+        "body_html": "<p>" + ("Lorem ipsum <b>dolor</b> sit amet. " * 40) + f"#{index}</p>",
+        "created_at": "2024-01-01T00:00:00Z",
+        "updated_at": "2024-01-01T00:00:00Z",
+        "variants": [
+            {"id": index * 10 + v, "sku": f"SKU-{index}-{v}", "price": "19.99", "compare_at_price": "24.99",
+             "grams": 250, "inventory_quantity": 5, "option1": f"Size {v}"}
+            for v in range(4)
+        ],
+        "images": [{"id": index * 10 + i, "src": f"https://cdn.example.com/{index}/{i}.jpg"} for i in range(3)],
+    }
+
+
+# * Route table that generates listing pages on demand, so the harness itself holds no catalog
+class CatalogRoutes:
+    def __init__(self, size):
+        self.size = size
+
+    def get(self, url):
+        parsed = urlparse(url)
+        if parsed.path == "/collections.json":
+            return (200, {"collections": []})
+        if parsed.path == "/products.json":
+            page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+            start = (page - 1) * PAGE_SIZE
+            products = [synthetic_product(i) for i in range(start, min(start + PAGE_SIZE, self.size))]
+            return (200, json.dumps({"products": products}).encode("utf-8"))
+        return None
+
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def crawl(size, data_dir):
+    limiter = HostRateLimiter(rate=1e6, max_rate=1e6)
+    async with HTTPClient(transport=StaticTransport(CatalogRoutes(size)), rate_limiter=limiter) as client:
+        scraper = ProductInfoScraper(STORE_URL, client=client, data_dir=data_dir, write_files=False)
+        await scraper.scrape_all_collections()
+        return scraper
+
+
+# * One catalog size per subprocess so ru_maxrss is not polluted by the previous run
+def child(size, full_records):
+    if full_records:
+        # ? Previous behaviour: retain the whole formatted product dict
+        src.product.ProductRecord.from_product = staticmethod(lambda product: product)
+    with tempfile.TemporaryDirectory() as data_dir:
+        start = timer()
+        scraper = asyncio.run(crawl(size, data_dir))
+        elapsed = timer() - start
+    print(json.dumps({
+        "size": size,
+        "retained": len(scraper.product_data),
+        "seconds": round(elapsed, 2),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }))
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Peak RSS of a product crawl against catalog size")
+    arg_parser.add_argument("--sizes", default="1000,5000,20000")
+    arg_parser.add_argument("--full-records", action="store_true", help="Retain full product dicts (old behaviour)")
+    arg_parser.add_argument("--child", type=int, default=None, help=argparse.SUPPRESS)
+    args = arg_parser.parse_args()
+
+    if args.child is not None:
+        child(args.child, args.full_records)
+        return
+
+    print(f"{'products':>10} {'retained':>10} {'seconds':>8} {'peak RSS MB':>12}")
+    for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+        command = [sys.executable, "-m", "benchmarks.memory", "--child", str(size)]
+        if args.full_records:
+            command.append("--full-records")
+        output = subprocess.run(command, check=True, capture_output=True, text=True, env=os.environ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{result['size']:>10} {result['retained']:>10} {result['seconds']:>8} {result['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
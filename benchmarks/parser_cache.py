@@ -0,0 +1,65 @@
+## ProductScrape/benchmarks/parser_cache.py
+# Usage: python -m benchmarks.parser_cache [--products-dir data/Products] [--repeat 5]
+
+import argparse
+import gzip
+import json
+import os
+from timeit import default_timer as timer
+from src.parser import HTMLParser
+
+
+# * Load every product.json / product.json.gz under the corpus folder
+def load_corpus(products_dir):
+    products = []
+    for root, dirs, files in os.walk(products_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if name == "product.json":
+                with open(path, "r", encoding="utf-8") as file:
+                    products.append(json.load(file))
+            elif name == "product.json.gz":
+                with open(path, "rb") as file:
+                    products.append(json.loads(gzip.decompress(file.read())))
+    return products
+
+
+# * The short, repetitive fields format_product_data cleans for every product
+def short_fields(products):
+    inputs = []
+    for product in products:
+        inputs.append(product.get("vendor") or "")
+        inputs.append(product.get("product_type") or "")
+        inputs.extend(tag for tag in product.get("tags", []) if isinstance(tag, str))
+    return inputs
+
+
+def run(inputs, clean, repeat):
+    start = timer()
+    for _ in range(repeat):
+        for text in inputs:
+            clean(text)
+    return timer() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Benchmark HTMLParser memoization on the product corpus")
+    arg_parser.add_argument("--products-dir", default="data/Products")
+    arg_parser.add_argument("--repeat", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    products = load_corpus(args.products_dir)
+    inputs = short_fields(products)
+    print(f"{len(products)} products, {len(inputs)} short strings, {len(set(inputs))} distinct")
+
+    uncached = run(inputs, HTMLParser().parse_html_to_text, args.repeat)
+    parser = HTMLParser()
+    cached = run(inputs, parser.parse_cached, args.repeat)
+
+    print(f"uncached: {uncached:.4f}s")
+    print(f"cached:   {cached:.4f}s ({uncached / cached if cached else 0:.1f}x)")
+    print(f"cache:    {parser.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+## ProductScrape/benchmarks/parser_parity.py
+# Usage: python -m benchmarks.parser_parity [--products-dir data/Products] [--random 20000] [--seed 0]
+
+import argparse
+import html
+import random
+import re
+import sys
+from urllib.parse import urlparse
+from bs4 import BeautifulSoup
+from benchmarks.parser_cache import load_corpus
+from src.parser import HTMLParser
+
+# * Entity map and cleaning steps of the original parser (baseline src/parser.py), kept verbatim so
+# * the fast paths in src.parser can be checked against it
+_BASELINE_ENTITIES = {
+    r'\u00A0': ' ', r'&nbsp;': ' ', r'&amp;': '&', r'&quot;': '"', r'&lt;': '<', r'&gt;': '>',
+    r'&#39;': "'", r'&apos;': "'", r'&cent;': '¢', r'&pound;': '£', r'&yen;': '¥', r'&euro;': '€',
+    r'&copy;': '©', r'&reg;': '®', r'&trade;': '™', r'&sect;': '§', r'&deg;': '°', r'&plusmn;': '±',
+    r'&para;': '¶', r'&middot;': '·', r'&ndash;': '–', r'&mdash;': '—', r'&lsquo;': '‘', r'&rsquo;': '’',
+    r'&ldquo;': '“', r'&rdquo;': '”', r'&bull;': '•', r'&hellip;': '…', r'&iquest;': '¿', r'&iexcl;': '¡',
+    r'&laquo;': '«', r'&raquo;': '»',
+}
+
+
+# ? The original also treated existing files as paths (os.path.isfile); corpus text never names one
+def baseline_parse(html_content):
+    try:
+        parsed = urlparse(html_content)
+        is_url = all([parsed.scheme, parsed.netloc])
+    except ValueError:
+        is_url = False
+    if is_url or re.match(r".*\.(html?|txt|json|csv|xml)$", html_content):
+        return html_content
+
+    soup = BeautifulSoup(html.unescape(html_content), "html.parser")
+    for tag in soup(["script", "style", "iframe", "img", "noscript", "embed", "object", "video", "audio"]):
+        tag.decompose()
+    for tag in soup.find_all(True):
+        tag.attrs = {}
+    for a in soup.find_all('a'):
+        a.unwrap()
+
+    text = soup.get_text(separator=' ', strip=True)
+    text = re.sub(r'\s+', ' ', text).strip()
+    for entity, replacement in _BASELINE_ENTITIES.items():
+        text = re.sub(entity, replacement, text)
+    return re.sub(r'\\u[0-9A-Fa-f]{4}', '', text)
+
+
+# * Every string anywhere in the corpus products (titles, descriptions, tags, variant and image fields)
+def corpus_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from corpus_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from corpus_strings(item)
+
+
+# * Edge cases around the fast paths: no tags, entities only, double-escaped markup, URLs, file names
+HAND_WRITTEN = [
+    "", " ", "plain text", "  spaced \t\n text  ", "Fish &amp; Chips", "&amp;amp;", "&lt;b&gt;bold&lt;/b&gt;",
+    "5 &lt; 6", "café   bar", "\\u00a0 literal escape", "a\\u00e9b", "&nbsp;&nbsp;x", "&#39;quoted&#39;",
+    "<p>para</p>", "<p>a</p><p>b</p>", "<script>x()</script>visible", "<a href='x'>link</a> text",
+    "<img src='a.png'>caption", "<br>", "<p>&amp;nbsp;</p>", "x < y > z", "a<b", "1 &lt 2", "&unknown;",
+    "https://example.com/a.png", "//cdn.shopify.com/s/files/x.jpg", "http:/broken", "mailto:x@y.z",
+    "report.pdf", "index.html", "data.JSON", "notes.txt ", "10ml & 20ml", "50/50 VG/PG", "100% <strong>VG</strong>",
+    "<ul><li>one</li><li>two</li></ul>", "<table><tr><td>a</td><td>b</td></tr></table>", "&lsquo;hi&rsquo; &hellip;",
+    "’smart’ quotes", "emoji \U0001F600 &euro;5", "tab\there", "<!-- comment -->after", "<![CDATA[x]]>",
+]
+
+_FRAGMENTS = [
+    "word", " ", "  ", "\n", "\t", "&amp;", "&lt;", "&gt;", "&nbsp;", "&#39;", "&quot;", "&euro;", "&mdash;",
+    "<p>", "</p>", "<br>", "<b>", "</b>", "<a href='u'>", "</a>", "<script>s()</script>", "<img src='i'>",
+    "<span class='c'>", "</span>", " ", "\\u00a0", "é", "’", "<", ">", "&", "/", ".", "//", "http://x.y",
+    ".html", ".txt", "10ml", "%",
+]
+
+
+def random_inputs(count, seed):
+    rng = random.Random(seed)
+    return ["".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(1, 12))) for _ in range(count)]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Check HTMLParser output against the original algorithm")
+    arg_parser.add_argument("--products-dir", default="data/Products")
+    arg_parser.add_argument("--random", type=int, default=20000, help="Randomly generated markup strings to add")
+    arg_parser.add_argument("--seed", type=int, default=0)
+    arg_parser.add_argument("--show", type=int, default=10, help="Mismatches to print")
+    args = arg_parser.parse_args()
+
+    products = load_corpus(args.products_dir)
+    inputs = [text for product in products for text in corpus_strings(product)]
+    inputs += HAND_WRITTEN + random_inputs(args.random, args.seed)
+    parser = HTMLParser()
+    mismatches = []
+    for text in inputs:
+        expected, actual = baseline_parse(text), parser.parse_html_to_text(text)
+        if expected != actual:
+            mismatches.append((text, expected, actual))
+
+    print(f"{len(products)} products, {len(inputs)} inputs ({len(set(inputs))} distinct), {len(mismatches)} mismatches")
+    for text, expected, actual in mismatches[:args.show]:
+        print(f"  input:    {text!r}\n  baseline: {expected!r}\n  current:  {actual!r}")
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+## ProductScrape/benchmarks/throughput.py
+# Usage: python -m benchmarks.throughput [--products 10000] [--latency 0.02] [--throttle-rate 0.01] [--mode pipeline]
+# Starts benchmarks.fake_shopify in a subprocess and runs the real scrapers against it.
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from timeit import default_timer as timer
+from src.client import HTTPClient
+from src.discovery import DISCOVERY_MODES
+from src.enrichment import DEFAULT_ENRICH_FIELDS, FAST_ENRICH_FIELDS
+from src.metrics import Metrics
+from src.pipeline import StorePipeline
+from src.product import ProductInfoScraper
+from src.ratelimit import HostRateLimiter
+from src.review import ReviewScraper
+from src.writer import BatchWriter
+from benchmarks.memory import peak_rss_mb
+
+SERVER_OPTIONS = (
+    "products_dir", "products", "collections", "overlap", "sparse_rate", "reviews_per_product",
+    "latency", "throttle_rate", "error_rate", "retry_after", "seed", "listing_cap", "review_page_size",
+    "shared_sku_rate", "missing_sku_rate",
+)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(args, port):
+    command = [sys.executable, "-m", "benchmarks.fake_shopify", "--port", str(port)]
+    for option in SERVER_OPTIONS:
+        value = getattr(args, option)
+        if value is not None:
+            command += [f"--{option.replace('_', '-')}", str(value)]
+    server = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    print(server.stdout.readline().strip())  # * Blocks until the server is about to listen
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                raise SystemExit("Fake server exited during startup")
+            time.sleep(0.05)
+    server.kill()
+    raise SystemExit("Fake server did not start")
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# * Wall time, CPU time and requests of one stage, plus the process's peak RSS so far.
+# ? ru_maxrss never resets, so after the first stage that column is a running maximum, not the
+# ? stage's own peak; measure a stage alone (e.g. --no-reviews, or benchmarks.memory) for that.
+class StageTimer:
+    def __init__(self, name, metrics):
+        self.name = name
+        self.metrics = metrics
+
+    async def run(self, coroutine, items):
+        requests, cpu, start = self.metrics.requests, cpu_seconds(), timer()
+        await coroutine
+        elapsed = timer() - start
+        count = items()
+        return {
+            "stage": self.name,
+            "items": count,
+            "seconds": round(elapsed, 2),
+            "items_per_second": round(count / elapsed, 1) if elapsed else 0.0,
+            "requests": self.metrics.requests - requests,
+            "requests_per_second": round((self.metrics.requests - requests) / elapsed, 1) if elapsed else 0.0,
+            "cpu_seconds": round(cpu_seconds() - cpu, 2),
+            "max_rss_mb_so_far": round(peak_rss_mb(), 1),
+        }
+
+
+async def run_benchmark(args, store_url, data_dir, run=1):
+    metrics = Metrics()
+    limiter = HostRateLimiter(rate=args.rate, max_rate=max(args.rate, args.max_rate), min_rate=args.min_rate,
+                              increase=args.increase, decrease=args.decrease)
+    writer = BatchWriter(compresslevel=args.compress_level, fsync=False)
+    async with HTTPClient(rate_limiter=limiter, metrics=metrics, backoff_base=args.backoff_base,
+                          limit_per_host=args.connections) as client:
+        product_scraper = ProductInfoScraper(
+            store_url, client=client, max_in_flight=args.product_concurrency, data_dir=data_dir,
+            write_files=not args.no_files, metrics=metrics, writer=writer, discovery=args.discovery,
+            use_sitemap=args.sitemap, collection_metadata=args.collection_metadata, page_window=args.page_window,
+            emit_known=not args.no_reviews, enrich_fields=FAST_ENRICH_FIELDS if args.fast_enrich else DEFAULT_ENRICH_FIELDS
+        )
+        review_scraper = ReviewScraper(
+            [], store_url, client=client, max_concurrency=args.review_concurrency, data_dir=data_dir,
+            write_files=not args.no_files, metrics=metrics, writer=writer,
+            reviews_api_url=f"{store_url}/timeline/data", page_window=args.page_window,
+            incremental=not args.full_reviews
+        )
+        results = []
+        suffix = f" #{run}" if args.runs > 1 else ""
+        if args.mode == "pipeline":
+            pipeline = StorePipeline(product_scraper, review_scraper, review_workers=args.review_concurrency,
+                                     metrics=metrics)
+            results.append(await StageTimer(f"pipeline{suffix}", metrics).run(
+                pipeline.run(), lambda: metrics.products
+            ))
+        else:
+            results.append(await StageTimer(f"crawl{suffix}", metrics).run(
+                product_scraper.scrape_all_collections(), lambda: metrics.products
+            ))
+            if not args.no_reviews:
+                review_scraper.product_data = product_scraper.product_data
+                results.append(await StageTimer(f"reviews{suffix}", metrics).run(
+                    review_scraper.scrape_reviews(), lambda: len(review_scraper.product_data)
+                ))
+        await writer.close()
+        server_stats = json.loads((await client.get(f"{store_url}/__stats")).body)
+        server_stats["limiter"] = limiter.stats()
+    return results, metrics.snapshot(), server_stats
+
+
+def print_table(results):
+    columns = ("stage", "items", "seconds", "items_per_second", "requests", "requests_per_second",
+               "cpu_seconds", "max_rss_mb_so_far")
+    print(" ".join(f"{column:>19}" for column in columns))
+    for result in results:
+        print(" ".join(f"{result[column]:>19}" for column in columns))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scraper throughput against a local fake Shopify store")
+    # Fake server
+    parser.add_argument("--products-dir", default="data/Products")
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--collections", type=int, default=20)
+    parser.add_argument("--overlap", type=float, default=0.1)
+    parser.add_argument("--sparse-rate", type=float, default=0.0)
+    parser.add_argument("--reviews-per-product", type=int, default=3)
+    parser.add_argument("--review-page-size", type=int, default=100)
+    parser.add_argument("--shared-sku-rate", type=float, default=0.0)
+    parser.add_argument("--missing-sku-rate", type=float, default=0.0)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--listing-cap", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    # Scraper
+    parser.add_argument("--mode", choices=("sequential", "pipeline"), default="sequential",
+                        help="sequential reports crawl and reviews separately; pipeline overlaps them")
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default="listing")
+    parser.add_argument("--sitemap", action="store_true")
+    parser.add_argument("--collection-metadata", action="store_true")
+    parser.add_argument("--page-window", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=1000.0, help="Starting requests/s of the host rate limiter")
+    parser.add_argument("--max-rate", type=float, default=5000.0)
+    # ? Production AIMD settings; with throttling enabled they dominate the run time, which is the point
+    parser.add_argument("--min-rate", type=float, default=0.5)
+    parser.add_argument("--increase", type=float, default=0.05, help="Rate added per successful request")
+    parser.add_argument("--decrease", type=float, default=0.5, help="Rate multiplier on 429/503")
+    parser.add_argument("--backoff-base", type=float, default=0.05)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--product-concurrency", type=int, default=16)
+    parser.add_argument("--review-concurrency", type=int, default=32)
+    parser.add_argument("--compress-level", type=int, default=6)
+    parser.add_argument("--no-files", action="store_true")
+    parser.add_argument("--fast-enrich", action="store_true", help="Listing-only enrichment, as main.py --fast-enrich")
+    parser.add_argument("--no-reviews", action="store_true")
+    parser.add_argument("--full-reviews", action="store_true", help="Refetch every review page on each run")
+    parser.add_argument("--runs", type=int, default=1,
+                        help="Scrape the same store N times into one data dir (later runs are incremental)")
+    parser.add_argument("--json", default=None, help="Also write the results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    port = free_port()
+    server = start_server(args, port)
+    data_dir = tempfile.mkdtemp(prefix="throughput-bench-")
+    results = []
+    try:
+        for run in range(1, args.runs + 1):
+            run_results, snapshot, server_stats = asyncio.run(
+                run_benchmark(args, f"http://127.0.0.1:{port}", data_dir, run)
+            )
+            results.extend(run_results)
+    finally:
+        server.terminate()
+        server.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    print_table(results)
+    print(f"client: retries {snapshot['retries']}, errors {snapshot['errors']}, "
+          f"throttled {snapshot['throttle_events']}, rate-limit wait {snapshot['rate_limit_wait_seconds']}s, "
+          f"latency p50 {snapshot['latency_p50']}s p95 {snapshot['latency_p95']}s")
+    print(f"limiter: {server_stats.pop('limiter')}")
+    print(f"server: {server_stats['requests']} requests, {server_stats['throttled']} throttled, "
+          f"{server_stats['errors']} errors")
+    if args.json:
+        os.makedirs(os.path.dirname(args.json) or ".", exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump({"args": vars(args), "results": results, "client": snapshot, "server": server_stats}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
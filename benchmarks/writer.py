@@ -0,0 +1,81 @@
+## ProductScrape/benchmarks/writer.py
+# Usage: python -m benchmarks.writer [--products-dir data/Products] [--files 2000] [--batch-size 64]
+
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from timeit import default_timer as timer
+import aiofiles
+import src.utils
+from src.writer import BatchWriter
+from benchmarks.parser_cache import load_corpus
+
+
+# * The pre-batching path: indent=4, gzip level 9, one aiofiles write per file on the loop
+async def legacy_write(records, directory):
+    for idx, record in enumerate(records):
+        filepath = os.path.join(directory, f"p{idx}", "product.json.gz")
+        os.makedirs(os.path.dirname(filepath), exist_ok=True)
+        async with aiofiles.open(filepath, "wb") as file:
+            await file.write(gzip.compress(json.dumps(record, ensure_ascii=False, indent=4).encode("utf-8")))
+
+
+async def batched_write(records, directory, batch_size, compresslevel, fsync):
+    writer = BatchWriter(batch_size=batch_size, compresslevel=compresslevel, fsync=fsync)
+    for idx, record in enumerate(records):
+        await writer.write(os.path.join(directory, f"p{idx}", "product.json.gz"), record)
+    await writer.flush()
+
+
+def disk_bytes(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, dirs, files in os.walk(directory) for name in files)
+
+
+def measure(label, make_coroutine, records):
+    directory = tempfile.mkdtemp(prefix="writer-bench-")
+    try:
+        start = timer()
+        asyncio.run(make_coroutine(directory))
+        elapsed = timer() - start
+        size = disk_bytes(directory)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(f"{label:<34} {len(records) / elapsed:>10.0f} {elapsed:>8.2f} {size / 1024 / 1024:>9.1f}")
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description="Throughput of the product/review file writers")
+    arg_parser.add_argument("--products-dir", default="data/Products")
+    arg_parser.add_argument("--files", type=int, default=2000)
+    arg_parser.add_argument("--batch-size", type=int, default=64)
+    args = arg_parser.parse_args()
+
+    corpus = load_corpus(args.products_dir)
+    if not corpus:
+        raise SystemExit(f"No products found under {args.products_dir}")
+    records = [corpus[i % len(corpus)] for i in range(args.files)]
+    orjson_module = src.utils.orjson
+    print(f"{len(records)} files from {len(corpus)} corpus products, orjson {'available' if orjson_module else 'missing'}")
+    print(f"{'writer':<34} {'files/s':>10} {'seconds':>8} {'disk MB':>9}")
+
+    measure("legacy (indent=4, level 9)", lambda d: legacy_write(records, d), records)
+    for compresslevel in (1, 6, 9):
+        measure(
+            f"batched level {compresslevel}, no fsync",
+            lambda d: batched_write(records, d, args.batch_size, compresslevel, False), records
+        )
+    measure("batched level 6, fsync per batch", lambda d: batched_write(records, d, args.batch_size, 6, True), records)
+    if orjson_module:
+        src.utils.orjson = None  # ? Same run with the stdlib serializer
+        try:
+            measure("batched level 6, stdlib json", lambda d: batched_write(records, d, args.batch_size, 6, False), records)
+        finally:
+            src.utils.orjson = orjson_module
+
+
+if __name__ == "__main__":
+    main()
@@ -1,88 +1,300 @@
 ## ProductScrape/main.py
 
+import argparse
 import asyncio
 import aiofiles
+import copy
 import os
+import subprocess
+import sys
+from src.cache import ResponseCache
+from src.discovery import DISCOVERY_MODES
+from src.client import HTTPClient
+from src.enrichment import DEFAULT_ENRICH_FIELDS, ENRICHABLE_FIELDS, FAST_ENRICH_FIELDS
+from src.export import StoreExporter
+from src.metrics import Metrics, TerminalReporter, JsonLinesReporter, PrometheusReporter
+from src.parser import CleaningExecutor
+from src.pipeline import StorePipeline
 from src.product import ProductInfoScraper
-from src.review import ReviewScraper
-from src.utils import log_info, track_progress_during_scraping
-
-# Helper function to count product files
-def count_scraped_product_files():
-    products_folder = "data/Products"
-    product_count = 0
-    if os.path.exists(products_folder):
-        # Count all product.json files in the Products folder
-        for root, dirs, files in os.walk(products_folder):
-            product_count += len([f for f in files if f == 'product.json'])
-    return product_count
-
-# Helper function to count review files
-def count_scraped_review_files():
-    products_folder = "data/Products"
-    review_count = 0
-    if os.path.exists(products_folder):
-        # Count all review files (review_*.json) in the Products folder
-        for root, dirs, files in os.walk(products_folder):
-            review_count += len([f for f in files if f.startswith('review_') and f.endswith('.json')])
-    return review_count
-
-async def get_store_urls():
-    choice = input("Do you want to use the store list from 'stores.txt'? (y/n): ").strip().lower()
+from src.writer import BatchWriter
+from src.review import ReviewScraper, REVIEWS_API_URL
+from src.utils import IncompleteCrawl, log_info, track_progress_during_scraping, store_key, store_data_dir
+from src.workqueue import WorkQueue, QueueWorker, make_worker_id
+
+# argparse types: a 0 or negative limit would create Semaphore(0)/empty worker pools and hang the run
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return number
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape products and reviews from Shopify stores.")
+
+    # Store input
+    parser.add_argument("--stores", default="data/stores.txt", help="File with one store URL per line (default: data/stores.txt)")
+    parser.add_argument("--store", action="append", default=[], help="Store URL to scrape; repeatable, replaces --stores")
+    parser.add_argument("--interactive", action="store_true", help="Prompt for the store list like older versions")
+    parser.add_argument("--output-dir", default="data", help="Base folder for per-store state and output (default: data)")
+
+    # Concurrency limits
+    parser.add_argument("--store-concurrency", type=positive_int, default=4, help="Stores scraped at the same time")
+    parser.add_argument("--collection-concurrency", type=positive_int, default=4, help="Collections crawled at once per store")
+    parser.add_argument("--product-concurrency", type=positive_int, default=16, help="Products enriched/saved at once per store")
+    parser.add_argument("--review-concurrency", type=positive_int, default=8, help="Products with review requests in flight per store")
+    parser.add_argument("--writer-workers", type=positive_int, default=2, help="Review write-stage workers per store")
+    parser.add_argument("--queue-size", type=positive_int, default=256, help="Bound of each pipeline queue (backpressure)")
+    parser.add_argument("--clean-workers", type=non_negative_int, default=0, help="Process-pool workers for HTML cleaning (0 = in-process)")
+
+    # Discovery
+    parser.add_argument("--discovery", choices=DISCOVERY_MODES, default="listing",
+                        help="listing: store-wide products.json at 250/page; collections: crawl every collection")
+    parser.add_argument("--sitemap", action="store_true", help="Also fetch products only listed in sitemap_products_*.xml")
+    parser.add_argument("--page-window", type=positive_int, default=4,
+                        help="Listing/review pages requested ahead of the one being processed (1 = sequential)")
+    parser.add_argument("--collection-metadata", action="store_true",
+                        help="Listing mode: save collection -> product handles to collections.json.gz")
+
+    # Feature toggles
+    parser.add_argument("--no-reviews", action="store_true", help="Skip review scraping")
+    parser.add_argument("--full-reviews", action="store_true",
+                        help="Re-download every review instead of only those newer than the last run")
+    parser.add_argument("--reviews-api-url", default=REVIEWS_API_URL, help=f"Reviews timeline endpoint (default: {REVIEWS_API_URL})")
+    parser.add_argument("--delta", action="store_true", help="Re-process products whose updated_at changed")
+    enrich = parser.add_mutually_exclusive_group()
+    enrich.add_argument("--enrich-fields", default=",".join(DEFAULT_ENRICH_FIELDS),
+                        help=f"Fields that trigger the per-product request when missing (default: all of "
+                             f"{', '.join(ENRICHABLE_FIELDS)}). inventory_quantity is never in listings, so it costs "
+                             "one extra request per product")
+    enrich.add_argument("--fast-enrich", action="store_const", dest="enrich_fields",
+                        const=",".join(FAST_ENRICH_FIELDS),
+                        help="Skip the per-product request when the listing has everything else: saves "
+                             "inventory_quantity as null and variants without their inventory")
+    parser.add_argument("--no-cache", action="store_true", help="Disable the on-disk HTTP cache")
+    parser.add_argument("--cache-max-mb", type=positive_int, default=512, help="HTTP cache size limit in MB")
+    parser.add_argument("--export", action="store_true", help="Stream products/variants/images/reviews into JSONL shards")
+    parser.add_argument("--export-shard-mb", type=positive_int, default=64, help="Uncompressed size at which export shards roll over")
+    parser.add_argument("--no-files", action="store_true", help="Don't write per-product/per-review files")
+    parser.add_argument("--write-batch", type=positive_int, default=64, help="Product/review files written per batch")
+    parser.add_argument("--compress-level", type=int, default=6, choices=range(0, 10), metavar="0-9",
+                        help="gzip level for product/review files (default: 6)")
+    parser.add_argument("--no-fsync", action="store_true", help="Don't sync each written batch to disk")
+    parser.add_argument("--resume", action="store_true", help="Continue interrupted crawls from their saved checkpoints")
+    parser.add_argument("--checkpoint-interval", type=float, default=5.0, help="Seconds between crawl checkpoint and review state saves")
+
+    # Distributed mode: a shared SQLite store queue that any number of worker processes/hosts drain
+    parser.add_argument("--queue-db", default=None,
+                        help="Shared work queue file; stores from --store/--stores are enqueued, then worked on")
+    parser.add_argument("--enqueue", action="store_true", help="Only enqueue the stores and exit (coordinator)")
+    parser.add_argument("--worker", action="store_true", help="Only work on the queue, don't enqueue (extra hosts)")
+    parser.add_argument("--workers", type=non_negative_int, default=0,
+                        help="Local worker processes to start on the queue (0 = work in this process)")
+    parser.add_argument("--requeue", action="store_true", help="Enqueue stores again even if already done/failed")
+    parser.add_argument("--lease-seconds", type=float, default=120.0,
+                        help="A store whose worker stops heartbeating for this long is claimable again")
+    parser.add_argument("--max-attempts", type=positive_int, default=3, help="Claims per store before it is marked failed")
+    parser.add_argument("--wait", action="store_true", help="Worker: keep polling for new stores instead of exiting")
+
+    # Reporting
+    parser.add_argument("--no-progress", action="store_true", help="Don't draw the terminal progress line (e.g. under cron)")
+    parser.add_argument("--metrics-file", default=None, help="Append JSON-lines metrics snapshots to this file")
+    parser.add_argument("--prometheus-port", type=int, default=None, help="Serve Prometheus metrics on 127.0.0.1:PORT")
+
+    args = parser.parse_args(argv)
+    args.enrich_fields = tuple(field.strip() for field in args.enrich_fields.split(",") if field.strip())
+    unknown = set(args.enrich_fields) - set(ENRICHABLE_FIELDS)
+    if unknown:
+        parser.error(f"unknown --enrich-fields: {', '.join(sorted(unknown))}")
+    return args
+
+async def get_store_urls(filepath="data/stores.txt"):
+    choice = input(f"Do you want to use the store list from '{filepath}'? (y/n): ").strip().lower()
     if choice == 'y':
-        return await load_store_urls_from_file()
+        return await load_store_urls_from_file(filepath)
     else:
         custom_url = input("Enter the Shopify store URL: ").strip()
         return [custom_url]
 
-async def load_store_urls_from_file():
-    filepath = "data/stores.txt"
+async def load_store_urls_from_file(filepath="data/stores.txt"):
     try:
         async with aiofiles.open(filepath, "r", encoding="utf-8") as file:
-            return [line.strip() for line in await file.readlines() if line.strip()]
+            return [line.strip() for line in await file.readlines() if line.strip() and not line.startswith("#")]
     except FileNotFoundError:
-        log_info("No 'stores.txt' file found.")
+        log_info(f"No '{filepath}' file found.")
         return []
 
-async def scrape_store_data(store_url, products_scraped, reviews_scraped):
-    log_info(f"Starting to scrape {store_url}")
-    product_scraper = ProductInfoScraper(store_url)
-    await product_scraper.initialize()  # Load previously scraped products
+async def resolve_store_urls(args):
+    if args.store:
+        return args.store
+    if args.interactive:
+        return await get_store_urls(args.stores)
+    return await load_store_urls_from_file(args.stores)
 
-    # Start scraping collections
-    await product_scraper.scrape_all_collections()
+def build_product_scraper(store_url, args, metrics, client, cleaner, writer, exporter=None):
+    return ProductInfoScraper(
+        store_url, client=client, max_in_flight=args.product_concurrency,
+        max_collections=args.collection_concurrency, data_dir=args.output_dir, cleaner=cleaner,
+        enrich_fields=args.enrich_fields, delta=args.delta, exporter=exporter,
+        write_files=not args.no_files, metrics=metrics, resume=args.resume,
+        checkpoint_interval=args.checkpoint_interval, writer=writer, discovery=args.discovery,
+        use_sitemap=args.sitemap, collection_metadata=args.collection_metadata, page_window=args.page_window,
+        emit_known=not args.no_reviews
+    )
 
-    # Count product files and update the products_scraped count
-    products_scraped[0] = count_scraped_product_files()
-    log_info(f"Total products scraped so far: {products_scraped[0]}")
+# Products reach the review scraper one at a time through StorePipeline
+def build_review_scraper(store_url, args, metrics, client, cleaner, writer, exporter=None):
+    return ReviewScraper(
+        [], store_url, client=client, max_concurrency=args.review_concurrency,
+        data_dir=args.output_dir, cleaner=cleaner, exporter=exporter,
+        write_files=not args.no_files, metrics=metrics, writer=writer, reviews_api_url=args.reviews_api_url,
+        page_window=args.page_window, incremental=not args.full_reviews, state_interval=args.checkpoint_interval
+    )
 
-async def scrape_reviews_for_products(product_data, store_url, reviews_scraped):
-    log_info(f"Scraping reviews for products in {store_url}...")
-    review_scraper = ReviewScraper(product_data, store_url)
-    review_scraper.scrape_reviews()
+# Crawl -> reviews -> write as one pipeline: reviews start as soon as the first product is saved
+async def process_store(store_url, args, metrics, client, cleaner, writer):
+    exporter = None
+    if args.export:
+        exporter = StoreExporter(
+            os.path.join(store_data_dir(store_url, args.output_dir), "export"), args.export_shard_mb * 1024 * 1024
+        )
+    try:
+        log_info(f"Starting to scrape {store_url}")
+        product_scraper = build_product_scraper(store_url, args, metrics, client, cleaner, writer, exporter)
+        review_scraper = None
+        if not args.no_reviews:
+            review_scraper = build_review_scraper(store_url, args, metrics, client, cleaner, writer, exporter)
+        pipeline = StorePipeline(
+            product_scraper, review_scraper, queue_size=args.queue_size,
+            review_workers=args.review_concurrency, writer_workers=args.writer_workers, metrics=metrics
+        )
+        await pipeline.run()
+        log_info(f"Totals so far: {metrics.products} products, {metrics.reviews} reviews")
+        # Raised after the pipeline drained, so the crawled products still get their reviews;
+        # a queue worker then requeues the store and the next attempt resumes from the checkpoint
+        if not product_scraper.crawl_complete:
+            raise IncompleteCrawl(f"crawl of {store_url} incomplete; checkpoint kept for --resume")
+    finally:
+        if exporter:
+            await exporter.close()
 
-    # Count review files and update the reviews_scraped count
-    reviews_scraped[0] = count_scraped_review_files()
-    log_info(f"Total reviews scraped so far: {reviews_scraped[0]}")
+# Keep one URL per store namespace so two scrapers never write the same store folder
+def unique_store_urls(store_urls):
+    unique = {}
+    for store_url in store_urls:
+        unique.setdefault(store_key(store_url), store_url)
+    return list(unique.values())
 
-async def process_store(store_url, products_scraped, reviews_scraped):
-    product_data = await scrape_store_data(store_url, products_scraped, reviews_scraped)
-    if product_data:
-        await scrape_reviews_for_products(product_data, store_url, reviews_scraped)
+# Keeps `store_concurrency` stores in flight from a queue; one failing store doesn't stop the others
+async def run_store_queue(store_urls, args, metrics, client, cleaner, writer):
+    queue = asyncio.Queue()
+    for store_url in store_urls:
+        queue.put_nowait(store_url)
 
-async def main():
-    store_urls = await get_store_urls()
+    async def worker():
+        while True:
+            try:
+                store_url = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                await process_store(store_url, args, metrics, client, cleaner, writer)
+            except Exception as e:
+                metrics.record_error()
+                log_info(f"Scraping {store_url} failed: {e!r}")
 
-    # Variables to track the counts of scraped products and reviews
-    products_scraped = [0]  # List so it's mutable
-    reviews_scraped = [0]   # List so it's mutable
+    workers = max(1, min(args.store_concurrency, len(store_urls)))
+    await asyncio.gather(*(worker() for _ in range(workers)))
 
-    # Track progress during scraping
-    await track_progress_during_scraping(
-        asyncio.gather(*(process_store(store_url, products_scraped, reviews_scraped) for store_url in store_urls)),
-        products_scraped,
-        reviews_scraped
-    )
+# Worker side of --queue-db: claim stores, heartbeat their leases, mark them done/failed
+async def run_queue_worker(work_queue, args, metrics, client, cleaner, writer):
+    async def process(store_url, attempt):
+        store_args = args
+        if attempt > 1 and not store_args.resume:
+            # An earlier worker stopped partway through: continue from its crawl checkpoint
+            store_args = copy.copy(args)
+            store_args.resume = True
+        await process_store(store_url, store_args, metrics, client, cleaner, writer)
+
+    worker = QueueWorker(work_queue, process, concurrency=args.store_concurrency, idle_exit=not args.wait)
+    await worker.run()
+
+# Start `--workers` copies of this command as queue workers and wait for them
+def spawn_local_workers(args, argv):
+    commands = []
+    for _ in range(args.workers):
+        worker_id = make_worker_id()
+        env = dict(os.environ, SCRAPE_WORKER_ID=worker_id, SCRAPE_LOG_FILE=f"scrape_log.{worker_id}.json")
+        command = [sys.executable, os.path.abspath(__file__), *argv, "--worker", "--no-progress"]
+        commands.append(subprocess.Popen(command, env=env))
+    log_info(f"Started {len(commands)} local queue workers")
+    return [process.wait() for process in commands]
+
+def report_queue(work_queue):
+    counts = work_queue.counts()
+    print(f"Queue {work_queue.filepath}: " + ", ".join(f"{count} {status}" for status, count in counts.items()))
+    for store_url, attempts, error in work_queue.failures():
+        print(f"  failed after {attempts} attempts: {store_url} ({error})")
+
+async def main(argv=None):
+    args = parse_args(argv)
+    work_queue = None
+    if args.queue_db:
+        work_queue = WorkQueue(args.queue_db, lease_seconds=args.lease_seconds, max_attempts=args.max_attempts)
+        if not args.worker:
+            store_urls = unique_store_urls(await resolve_store_urls(args))
+            work_queue.enqueue(store_urls, requeue=args.requeue)
+        if args.enqueue:
+            report_queue(work_queue)
+            return
+        if args.workers > 0 and not args.worker:
+            argv = sys.argv[1:] if argv is None else list(argv)
+            await asyncio.get_running_loop().run_in_executor(None, spawn_local_workers, args, argv)
+            report_queue(work_queue)
+            return
+    else:
+        store_urls = unique_store_urls(await resolve_store_urls(args))
+        if not store_urls:
+            log_info("No stores to scrape.")
+            return
+
+    # Live counters shared by the client and every scraper, rendered by the reporters
+    metrics = Metrics()
+    reporters = [] if args.no_progress else [TerminalReporter(show_reviews=not args.no_reviews)]
+    if args.metrics_file:
+        reporters.append(JsonLinesReporter(args.metrics_file))
+    if args.prometheus_port:
+        reporters.append(PrometheusReporter(port=args.prometheus_port))
+
+    # HTML cleaning stage shared by every store (process pool when --clean-workers > 0)
+    cleaner = CleaningExecutor(workers=args.clean_workers)
+    # Batched file writer shared by every store (compression and disk I/O in a worker thread)
+    writer = BatchWriter(batch_size=args.write_batch, compresslevel=args.compress_level, fsync=not args.no_fsync)
+
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(os.path.join(args.output_dir, "http_cache"), args.cache_max_mb * 1024 * 1024)
+
+    # One pooled HTTP client (single session, keep-alive, DNS cache) shared by every store
+    try:
+        async with HTTPClient(cache=cache, metrics=metrics) as client:
+            # Track progress during scraping
+            if work_queue:
+                scraping = run_queue_worker(work_queue, args, metrics, client, cleaner, writer)
+            else:
+                scraping = run_store_queue(store_urls, args, metrics, client, cleaner, writer)
+            await track_progress_during_scraping(scraping, metrics, reporters)
+            log_info(f"Rate limiter stats: {client.rate_limiter.stats()}")
+            if cache:
+                cache.report()
+    finally:
+        await writer.close()
+        cleaner.shutdown()
 
 if __name__ == "__main__":
     try:
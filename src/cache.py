@@ -0,0 +1,140 @@
+## ProductScrape/src/cache.py
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from src.utils import log_info, log_debug
+
+
+# * Disk-backed HTTP response cache keyed by URL.
+# * Only responses carrying an ETag or Last-Modified are stored; they are revalidated
+# * with If-None-Match / If-Modified-Since and served from disk on 304.
+class ResponseCache:
+    def __init__(self, directory="data/http_cache", max_bytes=512 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.total_bytes = None  # * Computed lazily from disk on first use
+        # ! Saves run in default-executor threads: one at a time, so the size count stays exact and
+        # ! eviction never walks or deletes entries that another thread is writing
+        self._lock = threading.Lock()
+        # * Stats
+        self.hits = 0  # 304 served from cache
+        self.misses = 0  # No usable entry, or the server sent a fresh body
+        self.stored = 0
+        self.evicted = 0
+        self.bytes_saved = 0
+
+    def _paths(self, url):
+        key = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        folder = os.path.join(self.directory, key[:2])
+        return os.path.join(folder, f"{key}.json"), os.path.join(folder, f"{key}.body")
+
+    def _load(self, url):
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as meta_file:
+                meta = json.load(meta_file)
+            with open(body_path, "rb") as body_file:
+                meta["body"] = body_file.read()
+            os.utime(meta_path)  # * Mark as recently used for eviction
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, url, meta, body):
+        with self._lock:
+            self._ensure_size()
+            meta_path, body_path = self._paths(url)
+            os.makedirs(os.path.dirname(meta_path), exist_ok=True)
+            previous = self._entry_size(meta_path, body_path)
+            with open(body_path, "wb") as body_file:
+                body_file.write(body)
+            with open(meta_path, "w", encoding="utf-8") as meta_file:
+                json.dump(meta, meta_file)
+            self.total_bytes += self._entry_size(meta_path, body_path) - previous
+            if self.total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entry_size(self, meta_path, body_path):
+        size = 0
+        for path in (meta_path, body_path):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    # * Under _lock
+    def _ensure_size(self):
+        if self.total_bytes is None:
+            self.total_bytes = 0
+            for root, dirs, files in os.walk(self.directory):
+                for name in files:
+                    self.total_bytes += os.path.getsize(os.path.join(root, name))
+
+    # ! Drop least recently used entries until the cache is back under 90% of max_bytes (under _lock)
+    def _evict(self):
+        entries = []
+        for root, dirs, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(".json"):
+                    meta_path = os.path.join(root, name)
+                    body_path = meta_path[:-len(".json")] + ".body"
+                    entries.append((os.path.getmtime(meta_path), meta_path, body_path))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, meta_path, body_path in entries:
+            if self.total_bytes <= target:
+                break
+            size = self._entry_size(meta_path, body_path)
+            for path in (meta_path, body_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self.total_bytes -= size
+            self.evicted += 1
+        log_debug(f"HTTP cache evicted down to {self.total_bytes} bytes")
+
+    async def lookup(self, url):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._load, url)
+
+    # * Conditional headers for a cached entry
+    def validators(self, entry):
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    async def store(self, url, response):
+        etag = response.headers.get("etag")
+        last_modified = response.headers.get("last-modified")
+        if response.status != 200 or not (etag or last_modified):
+            return
+        meta = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "headers": {"content-type": response.headers.get("content-type")},
+        }
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self._save, url, meta, response.body)
+        self.stored += 1
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stored": self.stored,
+            "evicted": self.evicted,
+            "bytes_saved": self.bytes_saved,
+            "size_bytes": self.total_bytes,
+        }
+
+    def report(self):
+        log_info(f"HTTP cache stats: {self.stats()}")
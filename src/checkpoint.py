@@ -0,0 +1,142 @@
+## ProductScrape/src/checkpoint.py
+
+import asyncio
+import json
+import os
+import time
+from src.records import ProductRecord
+from src.utils import log_info, log_debug
+
+# * Frontier keys for the store-wide products.json listing, the sitemap pass and collection membership
+MAIN_LISTING = "products.json"
+SITEMAP_LISTING = "sitemap.xml"
+MEMBERSHIP_LISTING = "collections.json"
+
+
+# * Durable crawl frontier for one store: collection list, next page per listing, finished listings,
+# * products claimed but not yet written (the enrichment queue) and products handed to the review
+# * stage whose review sync isn't saved yet. Saved atomically at most every `interval` seconds and
+# * whenever the crawl stops; the state is copied on the loop and written in the default executor.
+class CrawlCheckpoint:
+    def __init__(self, filepath, store_url, interval=5.0):
+        self.filepath = filepath
+        self.interval = interval
+        self.last_saved = 0.0
+        self.state = self._empty_state(store_url)
+        self._lock = asyncio.Lock()  # * FIFO, so copies reach the disk in the order they were taken
+        self._generation = 0  # * Bumped by clear(); copies taken before it are dropped
+
+    def _empty_state(self, store_url):
+        return {"store": store_url, "collections": None, "next_page": {}, "done": [], "pending": {}, "reviews": {}}
+
+    def load(self):
+        try:
+            with open(self.filepath, "r", encoding="utf-8") as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            return False
+        except (OSError, ValueError) as e:
+            log_info(f"Ignoring unreadable checkpoint {self.filepath}: {e}")
+            return False
+        if state.get("store") != self.state["store"]:
+            log_info(f"Ignoring checkpoint {self.filepath}: it belongs to {state.get('store')}")
+            return False
+        self.state.update(state)
+        log_info(
+            f"Resuming {self.state['store']}: {len(self.state['done'])} listings done, "
+            f"{len(self.state['pending'])} products pending, {len(self.state['reviews'])} awaiting reviews"
+        )
+        return True
+
+    @property
+    def collections(self):
+        return self.state["collections"]
+
+    @collections.setter
+    def collections(self, handles):
+        self.state["collections"] = list(handles)
+
+    @property
+    def pending(self):
+        return list(self.state["pending"].values())
+
+    def is_done(self, listing):
+        return listing in self.state["done"]
+
+    def start_page(self, listing):
+        return self.state["next_page"].get(listing, 1)
+
+    def page_done(self, listing, page):
+        self.state["next_page"][listing] = page + 1
+
+    def listing_done(self, listing):
+        if listing not in self.state["done"]:
+            self.state["done"].append(listing)
+        self.state["next_page"].pop(listing, None)
+
+    def add_pending(self, products):
+        for product in products:
+            self.state["pending"][product.get("handle")] = product
+
+    def is_pending(self, handle):
+        return handle in self.state["pending"]
+
+    def pending_done(self, handle):
+        self.state["pending"].pop(handle, None)
+
+    # * Review stage: products whose reviews are queued or synced but not yet saved
+    @property
+    def reviews_pending(self):
+        return [ProductRecord(handle, title, sku) for handle, (title, sku) in self.state["reviews"].items()]
+
+    def add_review_pending(self, record):
+        self.state["reviews"][record.handle] = [record.title, record.sku]
+
+    def reviews_done(self, handles):
+        for handle in handles:
+            self.state["reviews"].pop(handle, None)
+
+    async def maybe_save(self):
+        if time.monotonic() - self.last_saved >= self.interval:
+            await self.save()
+
+    # ? Shallow copies: the raw product payloads in `pending` are never modified once added
+    def _snapshot(self):
+        state = self.state
+        return {
+            **state,
+            "collections": None if state["collections"] is None else list(state["collections"]),
+            "next_page": dict(state["next_page"]),
+            "done": list(state["done"]),
+            "pending": dict(state["pending"]),
+            "reviews": dict(state["reviews"]),
+        }
+
+    def _write(self, state):
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        tmp_path = f"{self.filepath}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(state, file, ensure_ascii=False, separators=(",", ":"))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.filepath)
+
+    async def save(self):
+        self.last_saved = time.monotonic()  # * Before the await, so concurrent maybe_save calls don't pile up
+        state, generation = self._snapshot(), self._generation
+        async with self._lock:
+            if generation != self._generation:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write, state)
+        log_debug(f"Checkpoint saved to {self.filepath}")
+
+    # * Crawl and review stage finished: nothing left to resume
+    async def clear(self):
+        self._generation += 1
+        self.state = self._empty_state(self.state["store"])
+        async with self._lock:
+            try:
+                os.remove(self.filepath)
+            except FileNotFoundError:
+                pass
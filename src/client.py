@@ -0,0 +1,201 @@
+## ProductScrape/src/client.py
+
+import asyncio
+import json
+import aiohttp
+from timeit import default_timer as timer
+from src.metrics import Metrics
+from src.ratelimit import HostRateLimiter, THROTTLE_STATUSES, RETRY_STATUSES, parse_retry_after, backoff_delay
+from src.utils import log_debug, log_info
+
+# * Headers sent with every request (compression is negotiated here, decoded by aiohttp)
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "User-Agent": "ProductScrape/1.0",
+}
+
+
+# * Transport-agnostic response, so fake transports don't need aiohttp objects
+class Response:
+    __slots__ = ("url", "status", "headers", "body")
+
+    def __init__(self, url, status, headers=None, body=b""):
+        self.url = url
+        self.status = status
+        # * Header names are lower-cased for case-insensitive lookups
+        self.headers = {k.lower(): v for k, v in (headers or {}).items()}
+        self.body = body
+
+    def json(self):
+        if not self.body:
+            return None
+        return json.loads(self.body)
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+
+# * Default transport: one pooled aiohttp session with keep-alive and DNS caching
+class AiohttpTransport:
+    def __init__(
+        self,
+        limit=100,
+        limit_per_host=8,
+        ttl_dns_cache=300,
+        keepalive_timeout=30,
+        timeout=30,
+    ):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.ttl_dns_cache = ttl_dns_cache
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self._session = None
+
+    async def open(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                auto_decompress=True,
+            )
+
+    async def send(self, method, url, headers=None):
+        await self.open()
+        async with self._session.request(method, url, headers=headers) as response:
+            body = await response.read()
+            return Response(str(response.url), response.status, response.headers, body)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# * In-memory transport for tests: maps URLs to (status, payload) or to a callable
+class StaticTransport:
+    def __init__(self, routes=None, default_status=404):
+        self.routes = routes or {}
+        self.default_status = default_status
+        self.requests = []  # * Every URL requested, in order
+
+    async def send(self, method, url, headers=None):
+        self.requests.append(url)
+        route = self.routes.get(url)
+        if callable(route):
+            route = route(url, headers or {})
+        if route is None:
+            return Response(url, self.default_status)
+        if isinstance(route, Response):
+            return route
+        status, payload = route
+        body = payload if isinstance(payload, bytes) else json.dumps(payload).encode("utf-8")
+        return Response(url, status, {"Content-Type": "application/json"}, body)
+
+
+# * Shared HTTP client: one instance per run, handed to every scraper.
+# * Every request goes through the per-host rate limiter and the retry/backoff policy.
+class HTTPClient:
+    def __init__(self, transport=None, headers=None, rate_limiter=None, max_retries=5,
+                 backoff_base=1.0, backoff_cap=60.0, cache=None, metrics=None, **transport_options):
+        self.transport = transport or AiohttpTransport(**transport_options)
+        self.cache = cache  # * Optional ResponseCache for conditional requests
+        self.metrics = metrics or Metrics()
+        self.headers = {**DEFAULT_HEADERS, **(headers or {})}
+        self.rate_limiter = rate_limiter or HostRateLimiter()
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        opener = getattr(self.transport, "open", None)
+        if opener:
+            await opener()
+
+    async def close(self):
+        closer = getattr(self.transport, "close", None)
+        if closer:
+            await closer()
+
+    # * Returns the final Response; raises the last transport error if every attempt failed.
+    # * With a cache, stored validators are sent and a 304 is answered from disk as a 200.
+    async def get(self, url, headers=None):
+        if self.cache is None:
+            return await self._get_with_retries(url, headers)
+
+        entry = await self.cache.lookup(url)
+        conditional_headers = {**(headers or {}), **(self.cache.validators(entry) if entry else {})}
+        response = await self._get_with_retries(url, conditional_headers)
+        if response.status == 304 and entry:
+            self.cache.hits += 1
+            self.cache.bytes_saved += len(entry["body"])
+            return Response(url, 200, entry.get("headers"), entry["body"])
+        self.cache.misses += 1
+        await self.cache.store(url, response)
+        return response
+
+    async def _get_with_retries(self, url, headers=None):
+        request_headers = {**self.headers, **(headers or {})}
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            waited = await self.rate_limiter.acquire(url)
+            if waited:
+                self.metrics.record_rate_limit_wait(waited)
+            log_debug(f"GET {url}")
+            started = timer()
+            try:
+                response = await self.transport.send("GET", url, request_headers)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self.metrics.record_error()
+                if last_attempt:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                log_info(f"Connection error for {url}: {e}. Retrying in {delay:.1f}s (attempt {attempt + 1} of {self.max_retries})")
+            else:
+                self.metrics.record_request(response.status, len(response.body), timer() - started)
+                if response.status not in RETRY_STATUSES:
+                    self.rate_limiter.on_success(url)
+                    return response
+                if last_attempt:
+                    return response
+                retry_after = None
+                if response.status in THROTTLE_STATUSES:
+                    retry_after = parse_retry_after(response.headers.get("retry-after"))
+                    self.rate_limiter.on_throttle(url, retry_after)
+                    self.metrics.record_throttle()
+                # Retry-After already pauses the host bucket; the jitter just spreads the retries out
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                log_info(f"Got {response.status} for {url}, retrying in {delay:.1f}s (attempt {attempt + 1} of {self.max_retries})")
+            self.rate_limiter.retries += 1
+            self.metrics.record_retry()
+            await asyncio.sleep(delay)
+
+    # * Returns (status, parsed JSON or None); status is None if the request never succeeded
+    async def get_json(self, url, headers=None):
+        try:
+            response = await self.get(url, headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log_info(f"Giving up on {url}: {e}")
+            return None, None
+        if response.status != 200:
+            return response.status, None
+        try:
+            return response.status, response.json()
+        except ValueError:
+            log_debug(f"Invalid JSON returned by {url}")
+            return response.status, None
@@ -0,0 +1,57 @@
+## ProductScrape/src/discovery.py
+
+import asyncio
+import re
+import xml.etree.ElementTree as ET
+from src.utils import log_info, log_debug, fetch_url
+
+# * Ways to enumerate a store's products
+DISCOVERY_MODES = ("listing", "collections")
+
+# * Shopify's maximum page size for products.json / collections.json
+LISTING_LIMIT = 250
+
+_PRODUCT_PATH = re.compile(r"/products/([^/?#]+)/?$")
+
+
+# * <loc> values of a sitemap or sitemap index (namespace-agnostic)
+def parse_sitemap_locs(xml_text):
+    try:
+        root = ET.fromstring(xml_text)
+    except ET.ParseError as e:
+        log_debug(f"Unparseable sitemap: {e}")
+        return []
+    return [element.text.strip() for element in root.iter() if element.tag.endswith("loc") and element.text]
+
+
+# * Product handle from a storefront product URL (locale prefixes like /en-gb/ are fine)
+def handle_from_product_url(url):
+    match = _PRODUCT_PATH.search(url)
+    return match.group(1) if match else None
+
+
+# * Product handles listed in the store's sitemap_products_*.xml files, in sitemap order.
+# * `on_fetch` is called once per sitemap request (the scraper counts its discovery requests)
+async def sitemap_product_handles(client, store_url, on_fetch=None):
+    on_fetch = on_fetch or (lambda: None)
+    on_fetch()
+    index_text = await fetch_url(client, f"{store_url}/sitemap.xml")
+    if not index_text:
+        return []
+    loop = asyncio.get_running_loop()
+    sitemap_urls = [
+        url for url in await loop.run_in_executor(None, parse_sitemap_locs, index_text)
+        if "sitemap_products_" in url
+    ]
+    handles = {}
+    for sitemap_url in sitemap_urls:
+        on_fetch()
+        sitemap_text = await fetch_url(client, sitemap_url)
+        if not sitemap_text:
+            continue
+        for url in await loop.run_in_executor(None, parse_sitemap_locs, sitemap_text):
+            handle = handle_from_product_url(url)
+            if handle:
+                handles.setdefault(handle, None)
+    log_info(f"Sitemap lists {len(handles)} products in {len(sitemap_urls)} files for {store_url}")
+    return list(handles)
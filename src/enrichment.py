@@ -0,0 +1,67 @@
+## ProductScrape/src/enrichment.py
+
+# * Fields the per-product JSON (products/<handle>/reviews.json) can add to a listing product
+ENRICHABLE_FIELDS = ("variants", "weight", "inventory_quantity", "compare_at_price", "images")
+
+# * Fields that must be present before the extra request is skipped. weight is derived from the
+# * listing's variant grams; inventory_quantity is never in products.json listings, so the default
+# * (like the original scraper) still makes one extra request per product to fill it.
+DEFAULT_ENRICH_FIELDS = ENRICHABLE_FIELDS
+
+# * --fast-enrich: everything the listing can provide, no per-product request unless one is missing.
+# ! Lossy: inventory_quantity is saved as None and variants keep the listing's shape (no inventory)
+FAST_ENRICH_FIELDS = ("variants", "weight", "compare_at_price", "images")
+
+# * Listings give variant weight as grams; the per-product JSON gives it in weight_unit (kg unless set)
+_GRAMS_PER_UNIT = {"kg": 1000.0, "g": 1.0, "lb": 453.59237, "oz": 28.349523125}
+
+
+# * Decides per product whether the extra per-product request is needed,
+# * deriving everything it can from the products.json listing payload instead
+class EnrichmentPlanner:
+    def __init__(self, parser, fields=DEFAULT_ENRICH_FIELDS):
+        unknown = set(fields) - set(ENRICHABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Unknown enrichment fields: {', '.join(sorted(unknown))}")
+        self.parser = parser
+        self.fields = tuple(fields)
+        self.requests_skipped = 0
+        self.requests_needed = 0
+
+    # * Same shape fetch_reviews_json returns; a field is only included if the listing has it
+    def derive(self, product):
+        derived = {}
+        variants = product.get("variants")
+        if variants:
+            derived["variants"] = variants
+            first_variant = variants[0]
+            for field in ("weight", "inventory_quantity", "compare_at_price"):
+                if field in first_variant:
+                    derived[field] = first_variant[field]
+            grams = first_variant.get("grams")
+            if "weight" not in derived and isinstance(grams, (int, float)):
+                unit = first_variant.get("weight_unit") or "kg"
+                derived["weight"] = round(grams / _GRAMS_PER_UNIT.get(unit, 1000.0), 6)
+        if "images" in product:
+            derived["images"] = [
+                {
+                    "src": self.parser.parse_html_to_text(image.get("src")),  # Clean image URL
+                    "alt": self.parser.parse_html_to_text(image.get("alt")),  # Clean alt text
+                    "width": image.get("width"),
+                    "height": image.get("height")
+                } for image in product.get("images", []) if isinstance(image, dict)
+            ]
+        return derived
+
+    # * Returns (derived fields, whether the extra request is still needed)
+    def plan(self, product):
+        derived = self.derive(product)
+        needs_fetch = any(field not in derived for field in self.fields)
+        if needs_fetch:
+            self.requests_needed += 1
+        else:
+            self.requests_skipped += 1
+        return derived, needs_fetch
+
+    def stats(self):
+        return {"requests_skipped": self.requests_skipped, "requests_needed": self.requests_needed}
@@ -0,0 +1,145 @@
+## ProductScrape/src/export.py
+
+import asyncio
+import gzip
+import json
+import os
+import re
+import zlib
+from src.utils import log_info
+
+# * Product columns exported to the products stream (variants and images get their own rows)
+PRODUCT_COLUMNS = (
+    "handle", "title", "vendor", "product_type", "tags", "price", "compare_at_price",
+    "weight", "inventory_quantity", "description", "created_at", "updated_at",
+)
+
+
+# * Length of the complete gzip members at the start of a shard; anything after is a torn write
+def complete_gzip_length(path, chunk_size=1 << 16):
+    good = position = 0
+    decompressor = zlib.decompressobj(wbits=31)
+    with open(path, "rb") as file:
+        pending = b""
+        while True:
+            chunk = pending or file.read(chunk_size)
+            pending = b""
+            if not chunk:
+                return good
+            try:
+                decompressor.decompress(chunk)
+            except zlib.error:
+                return good
+            position += len(chunk) - len(decompressor.unused_data)
+            if decompressor.eof:
+                good = position
+                pending = decompressor.unused_data
+                decompressor = zlib.decompressobj(wbits=31)
+
+
+# * Gzipped JSON-lines shards that roll over once a shard passes max_bytes (uncompressed).
+# * Rows are buffered by write() and appended by commit() as one complete gzip member, so a shard
+# * is a valid (multi-member) gzip file after every commit and no file handle stays open. A kill
+# * during a commit can only tear the last member; the next run cuts it off before appending.
+# * Every run starts a new shard after the existing ones, so nothing is ever rewritten.
+class ShardWriter:
+    def __init__(self, directory, name, max_bytes=64 * 1024 * 1024, compresslevel=6):
+        self.directory = directory
+        self.name = name
+        self.max_bytes = max_bytes
+        self.compresslevel = compresslevel
+        self.shard_index = None  # * Found on the first commit, off the event loop
+        self.records = 0
+        self._rows = []
+        self._bytes = 0
+
+    def _existing_indexes(self):
+        pattern = re.compile(rf"^{re.escape(self.name)}-(\d+)\.jsonl\.gz$")
+        indexes = []
+        if os.path.isdir(self.directory):
+            for filename in os.listdir(self.directory):
+                match = pattern.match(filename)
+                if match:
+                    indexes.append(int(match.group(1)))
+        return indexes
+
+    def _path(self, index):
+        return os.path.join(self.directory, f"{self.name}-{index:05d}.jsonl.gz")
+
+    # * Trims a torn trailing member left by a killed run and picks the next shard index
+    def _start(self):
+        indexes = self._existing_indexes()
+        if indexes:
+            last = self._path(max(indexes))
+            good = complete_gzip_length(last)
+            if good < os.path.getsize(last):
+                with open(last, "rb+") as file:
+                    file.truncate(good)
+                log_info(f"Trimmed a torn write from {last} ({good} bytes kept)")
+        self.shard_index = max(indexes, default=-1) + 1
+
+    def write(self, record):
+        self._rows.append(json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n")
+
+    # ! Blocking: run in an executor
+    def commit(self):
+        if self.shard_index is None:
+            self._start()
+        if not self._rows:
+            return
+        rows, self._rows = b"".join(self._rows), []
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(self.shard_index), "ab") as file:
+            file.write(gzip.compress(rows, compresslevel=self.compresslevel))
+        self.records += rows.count(b"\n")
+        self._bytes += len(rows)
+        if self._bytes >= self.max_bytes:
+            self.shard_index += 1
+            self._bytes = 0
+
+
+# * Per-store export: products, variants, images and reviews as separate row streams.
+# * Callers export once the rows are committed elsewhere (product files and index saved, review sync
+# * state saved), so a resumed run never exports the same row twice; compression and appends run off the loop.
+class StoreExporter:
+    def __init__(self, directory, max_shard_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.products = ShardWriter(directory, "products", max_shard_bytes)
+        self.variants = ShardWriter(directory, "variants", max_shard_bytes)
+        self.images = ShardWriter(directory, "images", max_shard_bytes)
+        self.reviews = ShardWriter(directory, "reviews", max_shard_bytes)
+        self._lock = asyncio.Lock()  # * One commit at a time per store
+
+    def add_product(self, product):
+        handle = product.get("handle")
+        self.products.write({column: product.get(column) for column in PRODUCT_COLUMNS})
+        for position, variant in enumerate(product.get("variants") or [], 1):
+            self.variants.write({"product_handle": handle, "position": position, **variant})
+        for position, image in enumerate(product.get("images") or [], 1):
+            if isinstance(image, dict):
+                self.images.write({"product_handle": handle, "position": position, **image})
+
+    async def export_products(self, products):
+        for product in products:
+            self.add_product(product)
+        await self.commit((self.products, self.variants, self.images))
+
+    # * (product_handle, reviews) pairs, appended as one member
+    async def export_reviews(self, batches):
+        for product_handle, reviews in batches:
+            for review in reviews:
+                self.reviews.write({"product_handle": product_handle, **review})
+        await self.commit((self.reviews,))
+
+    async def commit(self, writers):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            for writer in writers:
+                await loop.run_in_executor(None, writer.commit)
+
+    async def close(self):
+        await self.commit((self.products, self.variants, self.images, self.reviews))
+        log_info(
+            f"Exported {self.products.records} products, {self.variants.records} variants, "
+            f"{self.reviews.records} reviews to {self.directory}"
+        )
@@ -0,0 +1,222 @@
+## ProductScrape/src/metrics.py
+
+import json
+import os
+import sys
+from collections import deque
+from timeit import default_timer as timer
+from aiohttp import web
+from src.utils import log_info, store_key
+
+
+# * Sliding window of recent request latencies for p50/p95
+class LatencyWindow:
+    def __init__(self, size=4096):
+        self.samples = deque(maxlen=size)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+
+    def percentile(self, percent):
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        index = min(len(ordered) - 1, int(round(percent / 100 * (len(ordered) - 1))))
+        return ordered[index]
+
+
+# * Live counters, updated incrementally by the client and scrapers
+class Metrics:
+    def __init__(self):
+        self.started = timer()
+        self.products = 0
+        self.reviews = 0
+        self.requests = 0
+        self.bytes = 0
+        self.retries = 0
+        self.errors = 0
+        self.throttle_events = 0  # * 429/503 responses
+        self.rate_limit_wait = 0.0  # * Seconds requests spent waiting on the per-host rate limiter
+        self.latency = LatencyWindow()
+        self.stores = {}
+        self.stages = {}  # * Pipeline stage name -> items processed and busy seconds
+
+    def _store(self, store_url):
+        key = store_key(store_url)
+        if key not in self.stores:
+            self.stores[key] = {"products": 0, "reviews": 0, "started": timer()}
+        return self.stores[key]
+
+    def record_request(self, status, nbytes, seconds):
+        self.requests += 1
+        self.bytes += nbytes
+        self.latency.add(seconds)
+        if status >= 500:
+            self.errors += 1
+
+    def record_retry(self):
+        self.retries += 1
+
+    def record_error(self):
+        self.errors += 1
+
+    def record_throttle(self):
+        self.throttle_events += 1
+
+    def record_rate_limit_wait(self, seconds):
+        self.rate_limit_wait += seconds
+
+    def store_started(self, store_url):
+        self._store(store_url)
+
+    def product_saved(self, store_url):
+        self.products += 1
+        self._store(store_url)["products"] += 1
+
+    def reviews_saved(self, store_url, count):
+        self.reviews += count
+        self._store(store_url)["reviews"] += count
+
+    def record_stage(self, name, seconds, items=1):
+        stage = self.stages.setdefault(name, {"items": 0, "busy": 0.0})
+        stage["items"] += items
+        stage["busy"] += seconds
+
+    def snapshot(self):
+        now = timer()
+        elapsed = now - self.started
+        p50 = self.latency.percentile(50)
+        p95 = self.latency.percentile(95)
+        return {
+            "elapsed": round(elapsed, 2),
+            "products": self.products,
+            "reviews": self.reviews,
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "retries": self.retries,
+            "errors": self.errors,
+            "throttle_events": self.throttle_events,
+            "rate_limit_wait_seconds": round(self.rate_limit_wait, 2),
+            "requests_per_second": round(self.requests / elapsed, 2) if elapsed else 0.0,
+            "latency_p50": round(p50, 4) if p50 is not None else None,
+            "latency_p95": round(p95, 4) if p95 is not None else None,
+            "stores": {
+                key: {
+                    "products": store["products"],
+                    "reviews": store["reviews"],
+                    "products_per_second": round(store["products"] / max(now - store["started"], 1e-9), 2),
+                }
+                for key, store in self.stores.items()
+            },
+            "stages": {
+                name: {
+                    "items": stage["items"],
+                    "items_per_second": round(stage["items"] / elapsed, 2) if elapsed else 0.0,
+                    "busy_seconds": round(stage["busy"], 2),
+                }
+                for name, stage in self.stages.items()
+            },
+        }
+
+
+# * Single-line spinner on stdout (replaces the old file-walking progress counter)
+class TerminalReporter:
+    loading_chars = "|/-\\"
+
+    def __init__(self, show_products=True, show_reviews=True):
+        self.show_products = show_products
+        self.show_reviews = show_reviews
+        self.idx = 0
+
+    async def start(self, metrics):
+        pass
+
+    async def report(self, snapshot):
+        status_line = f"\r{self.loading_chars[self.idx % len(self.loading_chars)]} Scraping in progress..."
+        self.idx += 1
+        if self.show_products:
+            status_line += f" Products Scraped: {snapshot['products']}"
+        if self.show_reviews:
+            status_line += f" Reviews Scraped: {snapshot['reviews']}"
+        status_line += f" Requests: {snapshot['requests']} ({snapshot['requests_per_second']}/s)"
+        if snapshot["throttle_events"]:
+            status_line += f" Throttled: {snapshot['throttle_events']}"
+        sys.stdout.write(status_line)
+        sys.stdout.flush()
+
+    async def stop(self, snapshot):
+        sys.stdout.write(
+            f"\rFinished! Scraping took {snapshot['elapsed']:.2f} seconds. "
+            f"Products: {snapshot['products']} Reviews: {snapshot['reviews']} {' ' * 30}\n"
+        )
+        sys.stdout.flush()
+
+
+# * Appends one JSON snapshot per interval to a file
+class JsonLinesReporter:
+    def __init__(self, filepath="data/metrics.jsonl"):
+        self.filepath = filepath
+
+    async def start(self, metrics):
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+
+    async def report(self, snapshot):
+        with open(self.filepath, "a", encoding="utf-8") as file:
+            file.write(json.dumps(snapshot) + "\n")
+
+    async def stop(self, snapshot):
+        await self.report(snapshot)
+
+
+# * Prometheus text exposition on http://host:port/metrics (localhost only by default)
+class PrometheusReporter:
+    def __init__(self, host="127.0.0.1", port=9108):
+        self.host = host
+        self.port = port
+        self.metrics = None
+        self._runner = None
+
+    async def start(self, metrics):
+        self.metrics = metrics
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        log_info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    async def handle(self, request):
+        return web.Response(text=self.render(self.metrics.snapshot()), content_type="text/plain")
+
+    def render(self, snapshot):
+        lines = []
+        for name in ("products", "reviews", "requests", "bytes", "retries", "errors", "throttle_events"):
+            lines.append(f"# TYPE productscrape_{name}_total counter")
+            lines.append(f"productscrape_{name}_total {snapshot[name]}")
+        lines.append("# TYPE productscrape_rate_limit_wait_seconds_total counter")
+        lines.append(f"productscrape_rate_limit_wait_seconds_total {snapshot['rate_limit_wait_seconds']}")
+        lines.append("# TYPE productscrape_request_latency_seconds summary")
+        for quantile, key in (("0.5", "latency_p50"), ("0.95", "latency_p95")):
+            if snapshot[key] is not None:
+                lines.append(f'productscrape_request_latency_seconds{{quantile="{quantile}"}} {snapshot[key]}')
+        lines.append("# TYPE productscrape_store_products_total counter")
+        for store, values in snapshot["stores"].items():
+            lines.append(f'productscrape_store_products_total{{store="{store}"}} {values["products"]}')
+        lines.append("# TYPE productscrape_store_reviews_total counter")
+        for store, values in snapshot["stores"].items():
+            lines.append(f'productscrape_store_reviews_total{{store="{store}"}} {values["reviews"]}')
+        lines.append("# TYPE productscrape_stage_items_total counter")
+        for stage, values in snapshot["stages"].items():
+            lines.append(f'productscrape_stage_items_total{{stage="{stage}"}} {values["items"]}')
+        lines.append("# TYPE productscrape_stage_busy_seconds_total counter")
+        for stage, values in snapshot["stages"].items():
+            lines.append(f'productscrape_stage_busy_seconds_total{{stage="{stage}"}} {values["busy_seconds"]}')
+        return "\n".join(lines) + "\n"
+
+    async def report(self, snapshot):
+        pass
+
+    async def stop(self, snapshot):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,38 @@
+## ProductScrape/src/paginate.py
+
+import asyncio
+from collections import deque, namedtuple
+
+# * One fetched page: number, HTTP status, extracted items (None unless 200) and whether it ends the listing
+Page = namedtuple("Page", ["number", "status", "items", "last"])
+
+
+# * Async generator over a paginated listing that keeps up to `window` page requests in flight.
+# * Pages are yielded strictly in order. The listing ends at the first failed or empty page, or at
+# * a short page when page_size is known; requests already sent past that point are cancelled.
+# * The window opens gradually (1, 1, 2, 4, ... pages ahead), so one- and two-page listings cost
+# * no extra requests and only long listings pay for speculation.
+async def paginate(fetch_page, extract, start=1, window=4, page_size=None):
+    in_flight = deque()
+    next_number = start
+    full_pages = 0
+    try:
+        while True:
+            target = 1 if full_pages == 0 else min(max(1, window), 2 ** (full_pages - 1))
+            while len(in_flight) < target:
+                in_flight.append((next_number, asyncio.ensure_future(fetch_page(next_number))))
+                next_number += 1
+            number, request = in_flight.popleft()
+            status, data = await request
+            items = extract(data) if status == 200 else None
+            last = not items or (page_size is not None and len(items) < page_size)
+            yield Page(number, status, items, last)
+            if last:
+                return
+            full_pages += 1
+    finally:
+        # ! Overshoot past the last page (or an abandoned iteration): drop the speculative requests
+        for _, request in in_flight:
+            request.cancel()
+        if in_flight:
+            await asyncio.gather(*(request for _, request in in_flight), return_exceptions=True)
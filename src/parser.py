@@ -1,8 +1,10 @@
 ## ProductScrape/src/parser.py
 
+import asyncio
 import html
 import re
-import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from bs4 import BeautifulSoup, MarkupResemblesLocatorWarning
 from urllib.parse import urlparse
 import warnings
@@ -10,16 +12,107 @@ import warnings
 # Suppress the warning for inputs that look like file paths or locators
 warnings.filterwarnings("ignore", category=MarkupResemblesLocatorWarning)
 
+# * Patterns are compiled once at import instead of on every call
+_FILE_PATH_RE = re.compile(r".*\.(html?|txt|json|csv|xml)$")
+_WHITESPACE_RE = re.compile(r'\s+')
+_UNICODE_ESCAPE_RE = re.compile(r'\\u[0-9A-Fa-f]{4}')
+
+# * Replaced first, in one pass: "&amp;" must not be re-expanded by the later entities
+_PRIMARY_ENTITIES = {
+    '\u00A0': ' ',  # Non-breaking space
+    '&nbsp;': ' ',  # Non-breaking space (HTML)
+    '&amp;': '&',   # Ampersand
+}
+
+_SPECIAL_ENTITIES = {
+    '&quot;': '"',  # Double quotes
+    '&lt;': '<',    # Less than
+    '&gt;': '>',    # Greater than
+    '&#39;': "'",   # Single quote
+    '&apos;': "'",  # Apostrophe
+    '&cent;': '¢',  # Cent sign
+    '&pound;': '£', # Pound sterling
+    '&yen;': '¥',   # Yen sign
+    '&euro;': '€',  # Euro sign
+    '&copy;': '©',  # Copyright
+    '&reg;': '®',   # Registered trademark
+    '&trade;': '™', # Trademark
+    '&sect;': '§',  # Section sign
+    '&deg;': '°',   # Degree symbol
+    '&plusmn;': '±',# Plus-minus sign
+    '&para;': '¶',  # Paragraph symbol
+    '&middot;': '·',# Middle dot
+    '&ndash;': '–', # En dash
+    '&mdash;': '—', # Em dash
+    '&lsquo;': '‘', # Left single quotation mark
+    '&rsquo;': '’', # Right single quotation mark
+    '&ldquo;': '“', # Left double quotation mark
+    '&rdquo;': '”', # Right double quotation mark
+    '&bull;': '•',  # Bullet point
+    '&hellip;': '…',# Ellipsis
+    '&iquest;': '¿', # Inverted question mark
+    '&iexcl;': '¡',  # Inverted exclamation mark
+    '&laquo;': '«',  # Left angle quote
+    '&raquo;': '»',  # Right angle quote
+}
+
+_PRIMARY_ENTITY_RE = re.compile('|'.join(re.escape(key) for key in _PRIMARY_ENTITIES))
+_SPECIAL_ENTITY_RE = re.compile('|'.join(re.escape(key) for key in _SPECIAL_ENTITIES))
+
+
 class HTMLParser:
-    def __init__(self, keep_links=False):
+    def __init__(self, keep_links=False, cache_size=4096):
         self.keep_links = keep_links
+        # * Bounded LRU memo for short, highly repetitive inputs (vendors, tags, product types)
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def parse_cached(self, html_content):
+        if not html_content or not self.cache_size:
+            return self.parse_html_to_text(html_content)
+        try:
+            result = self._cache[html_content]
+        except KeyError:
+            self.cache_misses += 1
+            result = self.parse_html_to_text(html_content)
+            self._cache[html_content] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)  # Evict the least recently used entry
+            return result
+        self.cache_hits += 1
+        self._cache.move_to_end(html_content)
+        return result
+
+    def cache_info(self):
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+        }
 
     def parse_html_to_text(self, html_content):
+        if not html_content:
+            return html_content  # Nothing to clean (empty string or missing value)
+
         # Check if the input resembles a URL or a file path and skip parsing
         if self._is_url(html_content) or self._is_file_path(html_content):
             return html_content  # Return the content as-is
-        
-        decoded_content = html.unescape(html_content)
+
+        decoded_content = html.unescape(html_content) if '&' in html_content else html_content
+
+        # * Fast path: without tags or leftover entities BeautifulSoup would only strip the text
+        if '<' not in decoded_content and '&' not in decoded_content:
+            clean_text = self._normalize_whitespace(decoded_content)
+            if '\\u' in clean_text:
+                clean_text = _UNICODE_ESCAPE_RE.sub('', clean_text)
+            return clean_text
+
+        return self._parse_with_soup(decoded_content)
+
+    def _parse_with_soup(self, decoded_content):
         soup = BeautifulSoup(decoded_content, "html.parser")
         
         self._remove_unwanted_tags(soup)
@@ -35,7 +128,9 @@ class HTMLParser:
         return clean_text
 
     def _is_url(self, content):
-        # Check if content resembles a URL
+        # Check if content resembles a URL (a netloc always needs "//")
+        if '//' not in content:
+            return False
         try:
             result = urlparse(content)
             return all([result.scheme, result.netloc])
@@ -44,7 +139,7 @@ class HTMLParser:
 
     def _is_file_path(self, content):
         # Check if the content resembles a file path (e.g., ends with a common file extension)
-        return os.path.isfile(content) or re.match(r".*\.(html?|txt|json|csv|xml)$", content)
+        return _FILE_PATH_RE.match(content)
 
     def _remove_unwanted_tags(self, soup):
         for tag in soup(["script", "style", "iframe", "img", "noscript", "embed", "object", "video", "audio"]):
@@ -59,50 +154,18 @@ class HTMLParser:
             tag.attrs = {}
 
     def _normalize_whitespace(self, text):
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WHITESPACE_RE.sub(' ', text).strip()
         return text
 
     def _fix_special_cases(self, text):
-        special_char_map = {
-            r'\u00A0': ' ',  # Non-breaking space
-            r'&nbsp;': ' ',  # Non-breaking space (HTML)
-            r'&amp;': '&',   # Ampersand
-            r'&quot;': '"',  # Double quotes
-            r'&lt;': '<',    # Less than
-            r'&gt;': '>',    # Greater than
-            r'&#39;': "'",   # Single quote
-            r'&apos;': "'",  # Apostrophe
-            r'&cent;': '¢',  # Cent sign
-            r'&pound;': '£', # Pound sterling
-            r'&yen;': '¥',   # Yen sign
-            r'&euro;': '€',  # Euro sign
-            r'&copy;': '©',  # Copyright
-            r'&reg;': '®',   # Registered trademark
-            r'&trade;': '™', # Trademark
-            r'&sect;': '§',  # Section sign
-            r'&deg;': '°',   # Degree symbol
-            r'&plusmn;': '±',# Plus-minus sign
-            r'&para;': '¶',  # Paragraph symbol
-            r'&middot;': '·',# Middle dot
-            r'&ndash;': '–', # En dash
-            r'&mdash;': '—', # Em dash
-            r'&lsquo;': '‘', # Left single quotation mark
-            r'&rsquo;': '’', # Right single quotation mark
-            r'&ldquo;': '“', # Left double quotation mark
-            r'&rdquo;': '”', # Right double quotation mark
-            r'&bull;': '•',  # Bullet point
-            r'&hellip;': '…',# Ellipsis
-            r'&iquest;': '¿', # Inverted question mark
-            r'&iexcl;': '¡',  # Inverted exclamation mark
-            r'&laquo;': '«',  # Left angle quote
-            r'&raquo;': '»',  # Right angle quote
-        }
-
-        for entity, replacement in special_char_map.items():
-            text = re.sub(entity, replacement, text)
+        if '&' in text or '\u00A0' in text:
+            text = _PRIMARY_ENTITY_RE.sub(lambda m: _PRIMARY_ENTITIES[m.group(0)], text)
+            if '&' in text:
+                text = _SPECIAL_ENTITY_RE.sub(lambda m: _SPECIAL_ENTITIES[m.group(0)], text)
 
         # Remove any leftover Unicode sequences like \uXXXX
-        text = re.sub(r'\\u[0-9A-Fa-f]{4}', '', text)
+        if '\\u' in text:
+            text = _UNICODE_ESCAPE_RE.sub('', text)
 
         return text
 
@@ -133,3 +196,43 @@ class HTMLParser:
         table_text = '\n'.join(rows)
         table.insert_before(table_text)
         table.decompose()
+
+
+# * Module-level so pool workers can unpickle it; one parser per submitted batch
+def clean_text_batch(texts, keep_links=False):
+    parser = HTMLParser(keep_links=keep_links)
+    return [parser.parse_html_to_text(text) for text in texts]
+
+
+# * Optional process-pool stage for CPU-heavy cleaning (descriptions, review comments).
+# * workers=0 keeps everything in-process, which is cheaper for small runs.
+class CleaningExecutor:
+    def __init__(self, workers=0, batch_size=64, keep_links=False):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.keep_links = keep_links
+        self.parser = HTMLParser(keep_links=keep_links)
+        self._pool = None
+
+    async def clean_many(self, texts):
+        texts = list(texts)
+        if not self.workers or not texts:
+            return [self.parser.parse_html_to_text(text) for text in texts]
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        # Batches amortize the pickling round-trip across many strings
+        batches = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+        results = await asyncio.gather(
+            *(loop.run_in_executor(self._pool, clean_text_batch, batch, self.keep_links) for batch in batches)
+        )
+        return [text for batch in results for text in batch]
+
+    async def clean(self, text):
+        return (await self.clean_many([text]))[0]
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
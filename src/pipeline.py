@@ -0,0 +1,134 @@
+## ProductScrape/src/pipeline.py
+
+import asyncio
+from timeit import default_timer as timer
+from src.utils import log_info
+
+# ! Marks the end of a queue; each worker consumes exactly one
+_DONE = object()
+
+
+# * Per-store counters for one stage: items handled, time spent working, time blocked on the
+# * next stage's full queue (backpressure) and the deepest input queue seen
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.blocked = 0.0
+        self.max_queue = 0
+
+    def summary(self, elapsed):
+        rate = self.items / elapsed if elapsed else 0.0
+        return (
+            f"{self.name}: {self.items} items ({rate:.1f}/s, busy {self.busy:.1f}s, "
+            f"blocked {self.blocked:.1f}s, max queue {self.max_queue})"
+        )
+
+
+# * Staged store pipeline: product crawl -> review fetch -> review write.
+# * Stages are joined by bounded queues, so a slow stage blocks the put of the one before it
+# * and the crawl itself slows down instead of buffering the whole catalog in memory.
+class StorePipeline:
+    def __init__(self, product_scraper, review_scraper=None, queue_size=256, review_workers=8, writer_workers=2,
+                 metrics=None):
+        self.product_scraper = product_scraper
+        self.review_scraper = review_scraper
+        self.metrics = metrics or product_scraper.metrics
+        self.review_workers = max(1, review_workers)
+        self.writer_workers = max(1, writer_workers)
+        self.review_queue = asyncio.Queue(maxsize=queue_size)
+        self.write_queue = asyncio.Queue(maxsize=queue_size)
+        self.stats = {name: StageStats(name) for name in ("crawl", "reviews", "write")}
+
+        self.product_scraper.retain_records = False  # Records flow through the queues instead
+        if self.review_scraper is not None:
+            self.product_scraper.on_product = self.emit_product
+            self.product_scraper.emit_known = True  # * Known products still get their reviews synced
+            # * Queued products stay in the crawl checkpoint until their review sync is saved, so a
+            # * --resume run hands them to the review stage again even though their pages are done
+            self.review_scraper.on_synced = self.product_scraper.checkpoint.reviews_done
+
+    def _record(self, stage, busy, input_queue):
+        stats = self.stats[stage]
+        stats.items += 1
+        stats.busy += busy
+        if input_queue is not None:
+            stats.max_queue = max(stats.max_queue, input_queue.qsize() + 1)
+        self.metrics.record_stage(stage, busy)
+
+    async def _put(self, stage, queue, item):
+        start = timer()
+        await queue.put(item)
+        self.stats[stage].blocked += timer() - start
+
+    # * Called by the product scraper for every saved product; blocks while the review queue is full
+    async def emit_product(self, record):
+        self.product_scraper.checkpoint.add_review_pending(record)
+        self._record("crawl", 0.0, None)
+        await self._put("crawl", self.review_queue, record)
+
+    async def review_worker(self):
+        while True:
+            record = await self.review_queue.get()
+            if record is _DONE:
+                return
+            start = timer()
+            try:
+                reviews = await self.review_scraper.fetch_product_reviews(record)
+            except Exception as e:
+                # ! One product's failure must not stall the queue for the rest of the store
+                self.metrics.record_error()
+                log_info(f"Fetching reviews for '{record.handle}' failed: {e!r}")
+                continue
+            self._record("reviews", timer() - start, self.review_queue)
+            await self._put("reviews", self.write_queue, (record, reviews))
+
+    async def write_worker(self):
+        while True:
+            item = await self.write_queue.get()
+            if item is _DONE:
+                return
+            record, reviews = item
+            start = timer()
+            try:
+                await self.review_scraper.save_product_reviews(record, reviews)
+            except Exception as e:
+                self.metrics.record_error()
+                log_info(f"Saving reviews for '{record.handle}' failed: {e!r}")
+                continue
+            self._record("write", timer() - start, self.write_queue)
+
+    async def _drain(self, reviewers, writers):
+        for _ in reviewers:
+            await self.review_queue.put(_DONE)
+        await asyncio.gather(*reviewers)
+        for _ in writers:
+            await self.write_queue.put(_DONE)
+        await asyncio.gather(*writers)
+        await self.review_scraper.flush()  # * Last partial batch of review files, then the sync state
+        await self.product_scraper.settle_checkpoint()
+        self.review_scraper.report()
+
+    async def run(self):
+        started = timer()
+        if self.review_scraper is None:
+            await self.product_scraper.scrape_all_collections()
+            return
+
+        reviewers = [asyncio.ensure_future(self.review_worker()) for _ in range(self.review_workers)]
+        writers = [asyncio.ensure_future(self.write_worker()) for _ in range(self.writer_workers)]
+        try:
+            # * Crawl runs in this task; reviews and writes overlap with it through the queues
+            await self.product_scraper.scrape_all_collections()
+            await self._drain(reviewers, writers)
+        finally:
+            # ! Crawl failed or was cancelled: stop the downstream workers too
+            for task in reviewers + writers:
+                task.cancel()
+            await asyncio.gather(*reviewers, *writers, return_exceptions=True)
+        elapsed = timer() - started
+        log_info(
+            f"Pipeline for {self.product_scraper.store_url}: "
+            + "; ".join(stats.summary(elapsed) for stats in self.stats.values())
+        )
@@ -1,162 +1,403 @@
 ## ProductScrape/src/product.py
 
-import aiohttp
 import asyncio
-from aiohttp import ClientConnectorError
-from src.utils import save_product_data, log_info, log_debug, is_duplicate, load_scraped_products, save_scraped_products
-from src.parser import HTMLParser
+import os
+from src.checkpoint import CrawlCheckpoint, MAIN_LISTING, SITEMAP_LISTING, MEMBERSHIP_LISTING
+from src.client import HTTPClient
+from src.metrics import Metrics
+from src.utils import batch_save_products, gather_or_cancel, log_info, log_debug, is_duplicate, is_unchanged, content_hash, load_scraped_products, save_scraped_products, store_data_dir, save_data
+from src.parser import HTMLParser, CleaningExecutor
+from src.records import ProductRecord
+from src.writer import BatchWriter
+from src.enrichment import EnrichmentPlanner, DEFAULT_ENRICH_FIELDS, ENRICHABLE_FIELDS
+from src.discovery import DISCOVERY_MODES, LISTING_LIMIT, sitemap_product_handles
+from src.paginate import paginate
 
 class ProductInfoScraper:
-    def __init__(self, store_url):
-        self.store_url = store_url
-        self.product_data = []
+    def __init__(self, store_url, client=None, max_in_flight=16, max_collections=4, data_dir="data", cleaner=None,
+                 enrich_fields=DEFAULT_ENRICH_FIELDS, delta=False, exporter=None, write_files=True,
+                 metrics=None, resume=False, checkpoint_interval=5.0, on_product=None, retain_records=True,
+                 writer=None, discovery="listing", use_sitemap=False, collection_metadata=False,
+                 page_window=4, emit_known=False):
+        self.store_url = store_url.rstrip("/")
+        # * Everything this store writes lives in its own namespace, so stores never share files
+        self.store_dir = store_data_dir(self.store_url, data_dir)
+        self.products_dir = os.path.join(self.store_dir, "Products")
+        self.index_path = os.path.join(self.store_dir, "product_list.json.gz")
+        # * Crawl frontier, saved periodically; with resume=True an interrupted crawl continues from it
+        self.resume = resume
+        self.checkpoint = CrawlCheckpoint(os.path.join(self.store_dir, "checkpoint.json"), self.store_url, checkpoint_interval)
+        self.crawl_complete = False  # * Every listing was read to its end
+        # * Output: per-product files (optional) and/or a streaming shard exporter
+        self.write_files = write_files
+        self.writer = writer or BatchWriter()  # * Batched, compressed-off-loop product file writes
+        self.exporter = exporter
+        self.metrics = metrics or Metrics()
+        self.metrics.store_started(self.store_url)
+        # * Discovery: "listing" enumerates products from products.json?limit=250 (plus the sitemap when
+        # * use_sitemap), "collections" crawls every collection's listing like older versions
+        if discovery not in DISCOVERY_MODES:
+            raise ValueError(f"Unknown discovery mode: {discovery}")
+        self.discovery = discovery
+        self.use_sitemap = use_sitemap
+        self.collection_metadata = collection_metadata  # Listing mode: also record collection -> handles
+        self.page_window = page_window  # * Listing pages requested ahead of the one being processed
+        self.membership_path = os.path.join(self.store_dir, "collections.json.gz")
+        self.product_data = []  # Slim ProductRecords only; full products are streamed to disk/export
+        self.retain_records = retain_records  # A pipeline consumes records via on_product and needs no list
+        # * Awaited with each saved ProductRecord; a bounded queue here throttles the crawl (backpressure)
+        self.on_product = on_product
+        # * Also hand on products skipped as already scraped, so their reviews can still be synced
+        self.emit_known = emit_known
         self.scraped_products = {}  # Initialize scraped_products to an empty dict
+        # * Bounds how many products of this store are enriched/saved at the same time
+        self.product_semaphore = asyncio.Semaphore(max_in_flight)
+        self.collection_semaphore = asyncio.Semaphore(max_collections)
+        # * Handles claimed during this run, shared by every collection crawled in parallel
+        self.seen_handles = set()
+        self.duplicates_skipped = 0  # Listings skipped because the product was already handled
+        # * Listing, sitemap and sitemap-only product requests of this store (enrichment is counted apart)
+        self.discovery_requests = 0
+        self.index_lock = asyncio.Lock()  # Serializes writes of the scraped products index
+        # * Delta mode re-processes products whose updated_at moved; otherwise any indexed handle is skipped
+        self.delta = delta
+        self.unchanged_skipped = 0  # Delta mode: re-fetched products whose content hash was unchanged
+        self.products_updated = 0  # Delta mode: previously indexed products that were rewritten
         self.parser = HTMLParser()  # Initialize the HTML parser
+        self.cleaner = cleaner or CleaningExecutor()  # Cleans descriptions, in-process unless a pool is shared in
+        # * Only products whose listing lacks one of enrich_fields get the extra per-product request
+        self.enrichment = EnrichmentPlanner(self.parser, enrich_fields)
+        # * Shared HTTP client; a private one is created only when none is passed in
+        self._owns_client = client is None
+        self.client = client or HTTPClient()
 
     async def initialize(self):
-        self.scraped_products = await load_scraped_products()  # Load previously scraped products
+        self.scraped_products = await load_scraped_products(self.index_path)  # Load previously scraped products
+
+    async def close(self):
+        if self._owns_client:
+            await self.client.close()
+
+    # * Pages of a Shopify listing at 250 per page, fetched ahead within page_window (see src.paginate)
+    def listing_pages(self, url, key, start=1):
+        return paginate(
+            lambda page: self.discovery_json(f"{url}?page={page}&limit={LISTING_LIMIT}"),
+            lambda data: (data or {}).get(key),
+            start, self.page_window, LISTING_LIMIT
+        )
+
+    def count_discovery_request(self):
+        self.discovery_requests += 1
+
+    async def discovery_json(self, url):
+        self.count_discovery_request()
+        return await self.client.get_json(url)
 
     async def get_collections(self):
-        collections_url = f"{self.store_url}/collections.json"
         collection_handles = []
-        page = 1
-
-        while True:
-            paginated_url = f"{collections_url}?page={page}&limit=250"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(paginated_url) as response:
-                    if response.status == 200:
-                        collections = await response.json()
-                        new_collections = collections.get('collections', [])
-                        if not new_collections:
-                            break  # Exit loop if no more collections are returned
-                        for collection in new_collections:
-                            collection_handles.append(collection['handle'])
-                        log_info(f"Found {len(new_collections)} collections on page {page} in {self.store_url}")
-                    else:
-                        log_info(f"Failed to retrieve collections from {self.store_url}, page {page}")
-                        log_debug(f"Failed with status code: {response.status}")
-                        break
-            page += 1
+        async for page in self.listing_pages(f"{self.store_url}/collections.json", "collections"):
+            if page.status != 200:
+                log_info(f"Failed to retrieve collections from {self.store_url}, page {page.number}")
+                log_debug(f"Failed with status code: {page.status}")
+            elif page.items:
+                for collection in page.items:
+                    collection_handles.append(collection['handle'])
+                log_info(f"Found {len(page.items)} collections on page {page.number} in {self.store_url}")
 
         log_info(f"Total collections found: {len(collection_handles)} in {self.store_url}")
         return collection_handles
 
     async def scrape_collection_products(self, collection_handle):
-        page = 1
-        while True:
-            collection_url = f"{self.store_url}/collections/{collection_handle}/products.json?page={page}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(collection_url) as response:
-                    if response.status == 200:
-                        products = await response.json()
-                        if not products.get("products"):
-                            break  # Exit pagination if no more products
-                        for product in products.get("products", []):
-                            product_handle = product.get("handle")
-                            if not is_duplicate(product_handle, self.scraped_products):  # Avoid duplicates
-                                formatted_product = self.format_product_data(product)
-                                additional_product_data = await self.fetch_reviews_json(product_handle)
-                                if additional_product_data:
-                                    formatted_product.update(additional_product_data)
-                                # Save product data
-                                self.product_data.append(formatted_product)
-                                await save_product_data(formatted_product, product_handle)  
-                                self.scraped_products[product_handle] = formatted_product["title"]
-                                await save_scraped_products(self.scraped_products)  # Save after each product
-                        log_info(f"Scraped page {page} of collection '{collection_handle}'")
-                    else:
-                        log_info(f"Failed to scrape products from collection '{collection_handle}', page {page}")
-                        break
-            page += 1
+        collection_url = f"{self.store_url}/collections/{collection_handle}/products.json"
+        start = self.checkpoint.start_page(collection_handle)
+        async for page in self.listing_pages(collection_url, "products", start):
+            if page.status != 200:
+                log_info(f"Failed to scrape products from collection '{collection_handle}', page {page.number}")
+                return
+            if page.items:
+                await self.process_products(page.items)
+                self.checkpoint.page_done(collection_handle, page.number)
+                await self.checkpoint.maybe_save()
+                log_info(f"Scraped page {page.number} of collection '{collection_handle}'")
+            if page.last:
+                self.checkpoint.listing_done(collection_handle)  # Empty or short page: nothing after it
 
     async def scrape_all_collections(self):
         await self.initialize()  # Load previously scraped products before scraping
-        collections = await self.get_collections()
-        for collection_handle in collections:
-            await self.scrape_collection_products(collection_handle)
-        if not collections:
+        if self.resume:
+            self.checkpoint.load()
+        try:
+            # Products whose reviews were still in the review stage, then products claimed but not
+            # written when the last run stopped (those are emitted again once processed)
+            if self.on_product:
+                for record in self.checkpoint.reviews_pending:
+                    if not self.checkpoint.is_pending(record.handle):
+                        self.seen_handles.add(record.handle)  # * A re-read listing page won't emit it twice
+                        await self.emit_record(record)
+            if self.checkpoint.pending:
+                await self.process_products(self.checkpoint.pending)
+            if self.discovery == "listing":
+                listings = await self.discover_from_listing()
+            else:
+                listings = await self.discover_from_collections()
+            log_info(f"Discovery for {self.store_url} used {self.discovery_requests} requests")
+        except BaseException:
+            # ! Interrupted or failed: persist the frontier so --resume can continue from here
+            await asyncio.shield(self.checkpoint.save())
+            raise
+        finally:
+            await self.save_index(close=True)  # * Crawl over: also release the journal handle
+
+        self.crawl_complete = all(self.checkpoint.is_done(listing) for listing in listings)
+        await self.settle_checkpoint()
+        log_info(f"Skipped {self.duplicates_skipped} duplicate product listings in {self.store_url}")
+        if self.delta:
+            log_info(f"Delta sync for {self.store_url}: {self.products_updated} updated, {self.unchanged_skipped} unchanged after re-fetch")
+        log_debug(f"Parser cache for {self.store_url}: {self.parser.cache_info()}")
+        log_info(f"Enrichment requests for {self.store_url}: {self.enrichment.stats()}")
+
+    # * Drops the checkpoint once the crawl is complete and no product awaits its reviews; otherwise
+    # * saves it for the next --resume. StorePipeline calls it again once the review stage drained.
+    async def settle_checkpoint(self):
+        if self.crawl_complete and not self.checkpoint.reviews_pending:
+            await self.checkpoint.clear()
+        else:
+            await self.checkpoint.save()
+
+    # * Older discovery: every collection's product listing, products.json only when there are none
+    async def discover_from_collections(self):
+        collections = await self.checkpoint_collections()
+        await gather_or_cancel(*(
+            self.scrape_collection_limited(handle)
+            for handle in collections if not self.checkpoint.is_done(handle)
+        ))
+        if not collections and not self.checkpoint.is_done(MAIN_LISTING):
+            await self.scrape_products_from_main()
+        return collections or [MAIN_LISTING]
+
+    # * Store-wide listing at 250 per page, then optional sitemap and collection membership passes.
+    # * Falls back to the collections crawl if the store-wide listing is unavailable.
+    async def discover_from_listing(self):
+        listings = [MAIN_LISTING]
+        if not self.checkpoint.is_done(MAIN_LISTING):
+            first_page = self.checkpoint.start_page(MAIN_LISTING)
             await self.scrape_products_from_main()
-        await save_scraped_products(self.scraped_products)
+            if not self.checkpoint.is_done(MAIN_LISTING) and self.checkpoint.start_page(MAIN_LISTING) == first_page == 1:
+                log_info(f"products.json unavailable for {self.store_url}; falling back to collections")
+                return await self.discover_from_collections()
+        if self.use_sitemap:
+            listings.append(SITEMAP_LISTING)
+            if not self.checkpoint.is_done(SITEMAP_LISTING):
+                await self.scrape_products_from_sitemap()
+        if self.collection_metadata:
+            listings.append(MEMBERSHIP_LISTING)
+            if not self.checkpoint.is_done(MEMBERSHIP_LISTING):
+                await self.save_collection_membership()
+        return listings
+
+    async def checkpoint_collections(self):
+        collections = self.checkpoint.collections
+        if collections is None:
+            collections = await self.get_collections()
+            self.checkpoint.collections = collections
+        return collections
+
+    # * Products in the sitemap that the listing didn't return (hidden or beyond its page cap)
+    async def scrape_products_from_sitemap(self):
+        handles = await sitemap_product_handles(self.client, self.store_url, self.count_discovery_request)
+        missing = [
+            handle for handle in handles
+            if handle not in self.seen_handles and (self.delta or not is_duplicate(handle, self.scraped_products))
+        ]
+        log_info(f"Fetching {len(missing)} sitemap-only products from {self.store_url}")
+        for start in range(0, len(missing), LISTING_LIMIT):
+            chunk = missing[start:start + LISTING_LIMIT]
+            results = await gather_or_cancel(*(
+                self.discovery_json(f"{self.store_url}/products/{handle}.json") for handle in chunk
+            ))
+            products = [data["product"] for status, data in results if status == 200 and data and "product" in data]
+            await self.process_products(products)
+            await self.checkpoint.maybe_save()
+        self.checkpoint.listing_done(SITEMAP_LISTING)
+
+    # * Collection -> product handles, from the collection listings at 250 per page (handles only)
+    async def save_collection_membership(self):
+        collections = await self.checkpoint_collections()
+
+        async def members(collection_handle):
+            handles = []
+            async with self.collection_semaphore:
+                collection_url = f"{self.store_url}/collections/{collection_handle}/products.json"
+                async for page in self.listing_pages(collection_url, "products"):
+                    handles.extend(product.get("handle") for product in page.items or [])
+            return collection_handle, handles
+
+        membership = dict(await gather_or_cancel(*(members(handle) for handle in collections)))
+        await save_data(self.membership_path, membership)
+        self.checkpoint.listing_done(MEMBERSHIP_LISTING)
+        log_info(f"Saved membership of {len(membership)} collections to {self.membership_path}")
+
+    async def scrape_collection_limited(self, collection_handle):
+        async with self.collection_semaphore:
+            await self.scrape_collection_products(collection_handle)
+
+    async def save_index(self, close=False):
+        async with self.index_lock:
+            await save_scraped_products(self.scraped_products, self.index_path, close)
 
     async def scrape_products_from_main(self):
         products_url = f"{self.store_url}/products.json"
-        page = 1
-        while True:
-            paginated_url = f"{products_url}?page={page}"
-            async with aiohttp.ClientSession() as session:
-                async with session.get(paginated_url) as response:
-                    if response.status == 200:
-                        products = await response.json()
-                        if not products.get("products"):
-                            break
-                        for product in products.get("products", []):
-                            product_handle = product.get("handle")
-                            if not is_duplicate(product_handle, self.scraped_products):
-                                formatted_product = self.format_product_data(product)
-                                additional_product_data = await self.fetch_reviews_json(product_handle)
-                                if additional_product_data:
-                                    formatted_product.update(additional_product_data)
-                                self.product_data.append(formatted_product)
-                                await save_product_data(formatted_product, product_handle)
-                                self.scraped_products[product_handle] = formatted_product["title"]
-                                await save_scraped_products(self.scraped_products)
-                        log_info(f"Scraped page {page} from main {self.store_url}/products.json")
-                    else:
-                        log_info(f"Failed to scrape main product page {page} from {self.store_url}")
-                        break
-            page += 1
+        async for page in self.listing_pages(products_url, "products", self.checkpoint.start_page(MAIN_LISTING)):
+            if page.status != 200:
+                log_info(f"Failed to scrape main product page {page.number} from {self.store_url}")
+                return
+            if page.items:
+                await self.process_products(page.items)
+                self.checkpoint.page_done(MAIN_LISTING, page.number)
+                await self.checkpoint.maybe_save()
+                log_info(f"Scraped page {page.number} from main {products_url}")
+            if page.last:
+                self.checkpoint.listing_done(MAIN_LISTING)
+
+    # * Enrich and save every new product of a page concurrently (bounded by product_semaphore)
+    async def process_products(self, products):
+        new_products = []
+        known_products = []
+        for product in products:
+            product_handle = product.get("handle")
+            # Claim the handle before any await so concurrent workers never process it twice
+            if product_handle in self.seen_handles or self.is_known(product):
+                self.duplicates_skipped += 1
+                if self.emit_known and product_handle not in self.seen_handles:
+                    self.seen_handles.add(product_handle)
+                    known_products.append(product)
+                continue
+            self.seen_handles.add(product_handle)
+            new_products.append(product)
+        for product in known_products:
+            await self.emit_record(ProductRecord.from_product(product))  # Still due a review sync
+        if not new_products:
+            return
+        self.checkpoint.add_pending(new_products)
+
+        try:
+            # * Clean the whole page's descriptions in one batch (off the loop when a pool is configured)
+            descriptions = await self.cleaner.clean_many(product.get("body_html", "") for product in new_products)
+        except Exception:
+            self.seen_handles.difference_update(product.get("handle") for product in new_products)
+            raise
+        results = await gather_or_cancel(*(
+            self.process_product(product, description)
+            for product, description in zip(new_products, descriptions)
+        ))
+        if self.write_files:
+            # * Files of the page land on disk (one batch, one sync) before the index records them
+            await batch_save_products([saved for saved, _ in results if saved], self.products_dir, self.writer)
+        # ! Only now: a concurrent page's save_index must not persist entries whose files aren't written,
+        # ! or a crash leaves products that every later run (and --resume) skips as known
+        for product, (_, entry) in zip(new_products, results):
+            self.scraped_products[product.get("handle")] = entry
+            self.checkpoint.pending_done(product.get("handle"))
+        await self.save_index()  # Save once per page
+        if self.exporter:
+            # * After the page is committed: a --resume never exports these products a second time
+            await self.exporter.export_products([saved for saved, _ in results if saved])
+
+    async def emit_record(self, record):
+        if self.retain_records:
+            self.product_data.append(record)
+        if self.on_product:
+            await self.on_product(record)
+
+    def is_known(self, product):
+        if self.delta:
+            return is_unchanged(product, self.scraped_products)
+        return is_duplicate(product.get("handle"), self.scraped_products)
+
+    async def process_product(self, product, cleaned_description=None):
+        product_handle = product.get("handle")
+        async with self.product_semaphore:
+            try:
+                formatted_product = self.format_product_data(product, cleaned_description)
+                derived_data, needs_fetch = self.enrichment.plan(product)
+                formatted_product.update(derived_data)
+                if needs_fetch:
+                    additional_product_data = await self.fetch_reviews_json(product_handle)
+                    if additional_product_data:
+                        formatted_product.update(additional_product_data)
+                for field in ENRICHABLE_FIELDS:
+                    formatted_product.setdefault(field, None)  # Keep the record shape stable
+                product_hash = content_hash(formatted_product)
+                previous_entry = self.scraped_products.get(product_handle)
+                changed = not (isinstance(previous_entry, dict) and previous_entry.get("hash") == product_hash)
+                if not changed:
+                    self.unchanged_skipped += 1  # Only the listing timestamp moved; keep the file as-is
+                else:
+                    if previous_entry is not None:
+                        self.products_updated += 1
+                    # Save product data (the file itself is written with the page's batch)
+                    self.metrics.product_saved(self.store_url)
+                if changed or self.emit_known:
+                    await self.emit_record(ProductRecord.from_product(formatted_product))
+                entry = {
+                    "title": formatted_product["title"],
+                    "updated_at": product.get("updated_at"),
+                    "hash": product_hash,
+                }
+                return (formatted_product if changed else None), entry
+            except Exception:
+                # ! Release the claim so another collection listing can retry this product
+                self.seen_handles.discard(product_handle)
+                raise
 
     async def fetch_reviews_json(self, product_handle):
         reviews_url = f"{self.store_url}/products/{product_handle}/reviews.json"
-        max_retries = 5
-        retry_delay = 5
-        
-        for attempt in range(max_retries):
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(reviews_url) as response:
-                        if response.status == 200:
-                            additional_data = await response.json()
-                            if additional_data and "product" in additional_data:
-                                return {
-                                    "variants": additional_data["product"]["variants"],
-                                    "weight": additional_data["product"]["variants"][0].get("weight"),
-                                    "inventory_quantity": additional_data["product"]["variants"][0].get("inventory_quantity"),
-                                    "compare_at_price": additional_data["product"]["variants"][0].get("compare_at_price"),
-                                    "images": [
-                                        {
-                                            "src": self.parser.parse_html_to_text(image.get("src")),  # Clean image URL
-                                            "alt": self.parser.parse_html_to_text(image.get("alt")),  # Clean alt text
-                                            "width": image.get("width"),
-                                            "height": image.get("height")
-                                        } for image in additional_data["product"].get("images", [])
-                                    ]
-                                }
-                        log_info(f"Failed to retrieve additional product data from {reviews_url}")
-            except ClientConnectorError as e:
-                log_info(f"Connection error: {e}. Retrying in {retry_delay} seconds... (Attempt {attempt + 1} of {max_retries})")
-                await asyncio.sleep(retry_delay)
-            except Exception as e:
-                log_info(f"An error occurred: {e}")
-        
-        log_info(f"Failed to retrieve data from {reviews_url} after {max_retries} attempts")
-        return None
+        # Retries, backoff and rate limiting are handled by the shared client
+        status, additional_data = await self.client.get_json(reviews_url)
+        if status != 200:
+            log_info(f"Failed to retrieve additional product data from {reviews_url} (status {status})")
+            return None
+        # ! One malformed product must not fail the store: validate the shape instead of trusting it
+        product = additional_data.get("product") if isinstance(additional_data, dict) else None
+        variants = product.get("variants") if isinstance(product, dict) else None
+        if not variants or not isinstance(variants, list) or not all(isinstance(variant, dict) for variant in variants):
+            log_info(f"Ignoring malformed product data from {reviews_url}: no usable variants")
+            return None
+        images = product.get("images") or []
+        try:
+            return {
+                "variants": variants,
+                "weight": variants[0].get("weight"),
+                "inventory_quantity": variants[0].get("inventory_quantity"),
+                "compare_at_price": variants[0].get("compare_at_price"),
+                "images": [
+                    {
+                        "src": self.parser.parse_html_to_text(image.get("src")),  # Clean image URL
+                        "alt": self.parser.parse_html_to_text(image.get("alt")),  # Clean alt text
+                        "width": image.get("width"),
+                        "height": image.get("height")
+                    } for image in images
+                ]
+            }
+        except (AttributeError, TypeError, ValueError) as e:
+            log_info(f"Ignoring malformed product data from {reviews_url}: {e!r}")
+            return None
 
-    def format_product_data(self, product):
-        description_html = product.get("body_html", "")
-        cleaned_description = self.parser.parse_html_to_text(description_html)  # Clean HTML description
+    def format_product_data(self, product, cleaned_description=None):
+        if cleaned_description is None:
+            description_html = product.get("body_html", "")
+            cleaned_description = self.parser.parse_html_to_text(description_html)  # Clean HTML description
 
         cleaned_title = self.parser.parse_html_to_text(product.get("title", ""))  # Clean product title
-        cleaned_vendor = self.parser.parse_html_to_text(product.get("vendor", ""))  # Clean vendor
-        cleaned_product_type = self.parser.parse_html_to_text(product.get("product_type", ""))  # Clean product type
+        cleaned_vendor = self.parser.parse_cached(product.get("vendor", ""))  # Clean vendor (memoized)
+        cleaned_product_type = self.parser.parse_cached(product.get("product_type", ""))  # Clean product type (memoized)
 
         return {
             "title": cleaned_title,
             "handle": product.get("handle"),
             "vendor": cleaned_vendor,
             "product_type": cleaned_product_type,
-            "tags": [self.parser.parse_html_to_text(tag) for tag in product.get("tags", [])],  # Clean tags
+            "tags": [self.parser.parse_cached(tag) for tag in product.get("tags", [])],  # Clean tags (memoized)
             "price": self.get_variant_price(product),
             "description": cleaned_description,  # Use cleaned description
             "created_at": product.get("created_at"),
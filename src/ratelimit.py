@@ -0,0 +1,109 @@
+## ProductScrape/src/ratelimit.py
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# * Status codes that mean "slow down" rather than "this request is wrong"
+THROTTLE_STATUSES = (429, 503)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+# * Retry-After may be a number of seconds or an HTTP date
+def parse_retry_after(value):
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# * Full-jitter exponential backoff: uniform(0, min(cap, base * 2^attempt))
+def backoff_delay(attempt, base=1.0, cap=60.0):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+# * Token bucket for a single host; rate is adjusted by HostRateLimiter
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(rate, 1.0)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    # * Waits until a token is available (and any Retry-After pause is over); returns seconds waited
+    async def acquire(self):
+        waited = 0.0
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                if now < self.paused_until:
+                    delay = self.paused_until - now
+                else:
+                    self._refill(now)
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return waited
+                    delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+
+# * Per-host token buckets with AIMD: additive increase on success, multiplicative decrease on throttle
+class HostRateLimiter:
+    def __init__(self, rate=4.0, min_rate=0.5, max_rate=20.0, increase=0.05, decrease=0.5):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.buckets = {}
+        # * Metrics
+        self.throttle_events = 0
+        self.retries = 0
+        self.wait_seconds = 0.0
+
+    def bucket(self, url):
+        host = urlparse(url).netloc
+        if host not in self.buckets:
+            self.buckets[host] = TokenBucket(self.initial_rate)
+        return self.buckets[host]
+
+    # * Returns the seconds this request waited for its host's bucket
+    async def acquire(self, url):
+        waited = await self.bucket(url).acquire()
+        self.wait_seconds += waited
+        return waited
+
+    def on_success(self, url):
+        bucket = self.bucket(url)
+        bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def on_throttle(self, url, retry_after=None):
+        bucket = self.bucket(url)
+        self.throttle_events += 1
+        bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+        bucket.tokens = min(bucket.tokens, 0.0)
+        if retry_after:
+            bucket.paused_until = max(bucket.paused_until, time.monotonic() + retry_after)
+
+    def stats(self):
+        return {
+            "throttle_events": self.throttle_events,
+            "retries": self.retries,
+            "wait_seconds": round(self.wait_seconds, 2),
+            "rates": {host: round(bucket.rate, 2) for host, bucket in self.buckets.items()},
+        }
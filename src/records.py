@@ -0,0 +1,21 @@
+## ProductScrape/src/records.py
+
+
+# * Slim, fixed-layout record of a scraped product: everything the review stage needs.
+# * The full formatted product goes straight to disk/export and is not kept in memory.
+class ProductRecord:
+    __slots__ = ("handle", "title", "sku")
+
+    def __init__(self, handle, title, sku=None):
+        self.handle = handle
+        self.title = title
+        self.sku = sku
+
+    @classmethod
+    def from_product(cls, product):
+        # * First variant with a SKU; an empty first-variant SKU shouldn't cost the product its reviews
+        sku = next((variant.get("sku") for variant in product.get("variants") or [] if variant.get("sku")), None)
+        return cls(product.get("handle"), product.get("title"), sku)
+
+    def __repr__(self):
+        return f"ProductRecord(handle={self.handle!r}, title={self.title!r}, sku={self.sku!r})"
@@ -1,71 +1,253 @@
 ## ProductScrape/src/review.py
 
-import requests
-from src.utils import save_review_data, log_info, log_debug
-from src.parser import HTMLParser  # Import the parser
+import asyncio
+import os
+from timeit import default_timer as timer
+from src.client import HTTPClient
+from src.metrics import Metrics
+from src.utils import save_review_data, gather_or_cancel, log_info, log_debug, store_data_dir
+from src.parser import HTMLParser, CleaningExecutor  # Import the parser
+from src.records import ProductRecord
+from src.paginate import paginate
+from src.review_state import ReviewSyncState
+from src.writer import BatchWriter
+
+# * Reviews.io timeline endpoint; overridable for self-hosted mirrors and the offline benchmarks
+REVIEWS_API_URL = "https://api.reviews.io/timeline/data"
 
 class ReviewScraper:
-    def __init__(self, product_data, store_url):
-        self.product_data = product_data
+    def __init__(self, product_data, store_url, client=None, max_concurrency=8, data_dir="data", cleaner=None,
+                 exporter=None, write_files=True, metrics=None, writer=None, reviews_api_url=REVIEWS_API_URL,
+                 page_window=4, incremental=True, per_page=5000, state_interval=5.0):
+        # * Slim records (handle, title, SKU); full product dicts are reduced on the way in
+        self.product_data = [
+            product if isinstance(product, ProductRecord) else ProductRecord.from_product(product)
+            for product in product_data
+        ]
         self.store_url = store_url
+        self.reviews_api_url = reviews_api_url
+        self.page_window = page_window  # * Timeline pages requested ahead of the one being processed
+        self.products_dir = os.path.join(store_data_dir(store_url, data_dir), "Products")
+        # * Incremental sync: only reviews newer than the last saved one per product are fetched and written
+        self.incremental = incremental
+        self.per_page = per_page
+        self.state = ReviewSyncState(os.path.join(store_data_dir(store_url, data_dir), "review_state.json.gz"))
+        # * The state is saved with a writer batch at most every state_interval seconds, and at the end
+        self.state_interval = state_interval
+        self._state_saved = timer()
+        # * SKU -> (bound, fetch task) for fetches still in flight; finished ones are dropped so their
+        # * reviews are freed once the products waiting on them have been handed their share
+        self.sku_fetches = {}
+        self.sku_queries = 0
+        self.sku_reused = 0
+        self.skipped_no_sku = 0
+        self.pages_saved = 0  # Review pages not requested because incremental sync stopped early
+        self.incomplete = 0  # Products left for the next run because a timeline page failed
+        self.write_files = write_files  # Per-review files are optional when an exporter is used
+        self.writer = writer or BatchWriter()  # * Review files are batched; flush() after the last product
+        self.writer.flush_hooks.append(self._on_writer_flush)
+        self.exporter = exporter
+        self.export_pending = []  # * (handle, reviews) exported once a saved state covers them
+        # * Called with the handles whose review sync is saved (StorePipeline clears them from the checkpoint)
+        self.on_synced = None
+        self.synced_pending = []
+        self.metrics = metrics or Metrics()
         self.parser = HTMLParser()  # Initialize the parser
+        self.cleaner = cleaner or CleaningExecutor()  # Cleans review comments, in-process unless a pool is shared in
+        # * Shared HTTP client; a private one is created only when none is passed in
+        self._owns_client = client is None
+        self.client = client or HTTPClient()
+        # * Caps how many products have review pages in flight at once
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def close(self):
+        self._unhook()
+        if self._owns_client:
+            await self.client.close()
 
-    def scrape_reviews(self):
+    async def scrape_reviews(self):
+        await self.state.load()
+        # * One query per SKU: products sharing a SKU get the same fetch, bounded by the oldest sync among them
+        groups = {}
         for product in self.product_data:
-            product_handle = product.get("handle")
-            product_sku = self.get_product_sku(product)  # Get SKU if needed
-            reviews = self.get_reviews_for_product(product_handle, product_sku)
-            save_review_data(reviews, product_handle)  # Save reviews under the correct product folder
-            log_info(f"Scraped {len(reviews)} reviews for product '{product['title']}'")
+            groups.setdefault(self.get_product_sku(product), []).append(product)
+        self.skipped_no_sku += len(groups.pop(None, []))
+        await gather_or_cancel(*(self.scrape_sku_group(sku, products) for sku, products in groups.items()))
+        await self.flush()
+        self.report()
+
+    async def scrape_sku_group(self, sku, products):
+        since = self.state.group_since(product.handle for product in products) if self.incremental else None
+        reviews = await self.reviews_for_sku(sku, since)
+        for product in products:
+            await self.save_product_reviews(product, self.new_reviews_for(product, reviews))
+
+    async def flush(self):
+        await self.writer.flush()
+        await self._persist_state()()  # * After the files, so the state never runs ahead of what is on disk
+        self._unhook()
+
+    def _unhook(self):
+        if self._on_writer_flush in self.writer.flush_hooks:
+            self.writer.flush_hooks.remove(self._on_writer_flush)
+
+    # * Writer hook, run as a batch is taken: every state update so far was made after its files were
+    # * queued, so a snapshot taken now is covered once this batch is on disk
+    def _on_writer_flush(self):
+        if timer() - self._state_saved < self.state_interval:
+            return None
+        return self._persist_state()
+
+    def _persist_state(self):
+        self._state_saved = timer()
+        snapshot = self.state.snapshot()
+        rows, self.export_pending = self.export_pending, []
+        handles, self.synced_pending = self.synced_pending, []
+
+        async def persist():
+            await self.state.write(snapshot)
+            if self.exporter and rows:
+                await self.exporter.export_reviews(rows)  # ! Only now: a rerun won't fetch these again
+            if self.on_synced and handles:
+                self.on_synced(handles)
+        return persist
+
+    def report(self):
+        log_info(
+            f"Review sync for {self.store_url}: {self.sku_queries} SKU queries, {self.sku_reused} reused, "
+            f"{self.skipped_no_sku} products without SKU, {self.pages_saved} pages saved by incremental sync, "
+            f"{self.incomplete} products incomplete"
+        )
 
-    def get_reviews_for_product(self, product_handle, product_sku):
+    # * Fetch stage: the product's reviews not saved before (all of them when incremental is off),
+    # * or None when a timeline page failed
+    async def fetch_product_reviews(self, product):
+        await self.state.load()
+        product_sku = self.get_product_sku(product)  # Get SKU if needed
+        if not product_sku:
+            self.skipped_no_sku += 1
+            log_debug(f"No SKU for product '{product.handle}'; skipping reviews")
+            return []
+        since = self.state.since(product.handle) if self.incremental else None
+        return self.new_reviews_for(product, await self.reviews_for_sku(product_sku, since))
+
+    # * A shared fetch may reach further back than this product's own sync point
+    def new_reviews_for(self, product, reviews):
+        since = self.state.since(product.handle) if self.incremental else None
+        if since is None or reviews is None:
+            return reviews
+        return [review for review in reviews if since.is_new(review)]
+
+    # * Shared per-SKU fetch: joins a fetch of the same SKU that is still in flight if its bound is at
+    # * least as old as `since`. scrape_reviews groups SKUs up front, so there each SKU is queried once;
+    # * in the pipeline products arrive one by one, and a shared SKU is queried again if the earlier
+    # * fetch already finished (or reached back less far than this product needs).
+    async def reviews_for_sku(self, sku, since):
+        entry = self.sku_fetches.get(sku)
+        if entry is not None:
+            fetched_since, fetch = entry
+            if fetched_since is None or fetched_since.covers(since):
+                self.sku_reused += 1
+                return await asyncio.shield(fetch)
+        fetch = asyncio.ensure_future(self._fetch_sku(sku, since))
+        self.sku_fetches[sku] = (since, fetch)
+        fetch.add_done_callback(lambda done: self._drop_fetch(sku, done))
+        return await asyncio.shield(fetch)
+
+    def _drop_fetch(self, sku, fetch):
+        entry = self.sku_fetches.get(sku)
+        if entry is not None and entry[1] is fetch:
+            del self.sku_fetches[sku]
+
+    async def _fetch_sku(self, sku, since):
+        self.sku_queries += 1
+        async with self.semaphore:
+            return await self.get_reviews_for_product(sku, sku, since)
+
+    # * Write stage: per-review files, export rows and counters
+    async def save_product_reviews(self, product, reviews):
+        product_handle = product.handle
+        if reviews is None:
+            # ! Pages are newest first: saving the part before a failed page would move the sync point
+            # ! past the older reviews still missing, so nothing is saved and the next run fetches it again
+            self.incomplete += 1
+            log_info(f"Reviews for product '{product.title}' incomplete; left for the next run")
+            return
+        # * Incremental runs append after the files already saved; full runs rewrite from review_1
+        start = self.state.count(product_handle) + 1 if self.incremental else 1
+        if self.write_files and reviews:
+            await save_review_data(reviews, product_handle, self.products_dir, self.writer, start)  # Save reviews under the correct product folder
+        if reviews or not self.incremental:
+            self.state.update(product_handle, reviews, replace=not self.incremental)
+            if self.exporter and reviews:
+                self.export_pending.append((product_handle, reviews))
+        self.synced_pending.append(product_handle)
+        if not self.write_files:
+            persist = self._on_writer_flush()  # ? No files to wait for
+            if persist is not None:
+                await persist()
+        self.metrics.reviews_saved(self.store_url, len(reviews))
+        log_info(f"Scraped {len(reviews)} new reviews for product '{product.title}'")
+
+    # * All reviews (or those newer than `since`); None if any page failed, since the list would have a gap
+    async def get_reviews_for_product(self, product_handle, product_sku, since=None):
         reviews_url = self.build_reviews_api_url(product_sku)
         log_debug(f"Fetching reviews from: {reviews_url}")
         reviews = []
-        page = 1
-
-        while True:
-            paginated_url = f"{reviews_url}&page={page}&per_page=5000"
-            response = requests.get(paginated_url)
-            
-            if response.status_code == 200:
-                data = response.json()
-                timeline_reviews = data.get("timeline", [])
-                
-                if not timeline_reviews:
-                    break  # Exit if no more reviews are available
-
-                reviews.extend(self.parse_reviews(timeline_reviews))
-                log_debug(f"Fetched {len(timeline_reviews)} reviews for product handle: {product_handle}")
-                page += 1
-            else:
-                log_info(f"Failed to scrape reviews for product handle '{product_handle}', page {page}")
-                break
+
+        # * Pages are requested ahead (page_window) but processed in order; no short-page stop,
+        # * since the API may cap per_page below what was asked for
+        pages = paginate(
+            lambda number: self.client.get_json(f"{reviews_url}&page={number}&per_page={self.per_page}"),
+            lambda data: (data or {}).get("timeline", []),
+            window=self.page_window,
+        )
+        try:
+            async for page in pages:
+                if page.status != 200:
+                    log_info(f"Failed to scrape reviews for product handle '{product_handle}', page {page.number}")
+                    return None
+                elif page.items:
+                    cleaned_comments = await self.cleaner.clean_many(
+                        review.get('_source', {}).get("comments", "") for review in page.items
+                    )
+                    parsed = self.parse_reviews(page.items, cleaned_comments)
+                    log_debug(f"Fetched {len(page.items)} reviews for product handle: {product_handle}")
+                    if since is not None and not all(since.is_new(review) for review in parsed):
+                        # ! sort=date_desc: this page reached reviews saved by an earlier run, older pages hold nothing new
+                        reviews.extend(review for review in parsed if since.is_new(review))
+                        if not page.last:
+                            self.pages_saved += 1
+                        break
+                    reviews.extend(parsed)
+        finally:
+            await pages.aclose()  # * Cancels pages requested ahead when paging stops early
 
         return reviews
 
     def build_reviews_api_url(self, product_sku):
-        base_api_url = "https://api.reviews.io/timeline/data"
-        return f"{base_api_url}?type=product_review&store={self.store_url}&sku={product_sku}&sort=date_desc&include_sentiment_analysis=true"
+        return f"{self.reviews_api_url}?type=product_review&store={self.store_url}&sku={product_sku}&sort=date_desc&include_sentiment_analysis=true"
 
     def get_product_sku(self, product):
-        variants = product.get("variants", [])
-        if variants:
-            return variants[0].get("sku")
-        return None
+        if isinstance(product, ProductRecord):
+            return product.sku or None
+        return ProductRecord.from_product(product).sku or None
 
-    def parse_reviews(self, timeline_reviews):
+    def parse_reviews(self, timeline_reviews, cleaned_comments=None):
         parsed_reviews = []
         for idx, review in enumerate(timeline_reviews):
             review_data = review.get('_source', {})
-            cleaned_comments = self.parser.parse_html_to_text(review_data.get("comments", ""))  # Clean review comments
+            if cleaned_comments is not None:
+                comments = cleaned_comments[idx]  # Already cleaned in a batch by the executor
+            else:
+                comments = self.parser.parse_html_to_text(review_data.get("comments", ""))  # Clean review comments
             cleaned_author = self.parser.parse_html_to_text(review_data.get("author", ""))  # Clean author
 
             parsed_reviews.append({
                 "author": cleaned_author,
                 "rating": review_data.get("rating"),
-                "comments": cleaned_comments,
-                "product_name": self.parser.parse_html_to_text(review_data.get("product_name", "")),  # Clean product name
+                "comments": comments,
+                "product_name": self.parser.parse_cached(review_data.get("product_name", "")),  # Clean product name (memoized)
                 "date_created": review_data.get("date_created"),
                 "sku": review_data.get("sku"),
                 "order_id": review_data.get("order_id"),
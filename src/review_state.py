@@ -0,0 +1,125 @@
+## ProductScrape/src/review_state.py
+
+import asyncio
+import gzip
+import json
+import os
+from src.utils import log_info, log_debug, content_hash
+
+
+# * Stable identity of a parsed review, used to tell apart reviews sharing the newest timestamp
+def review_key(review):
+    return content_hash(review, exclude=("product_name",))[:16]
+
+
+# * Lower bound for an incremental fetch: the newest date already saved and the keys saved at that date
+class Since:
+    __slots__ = ("newest", "keys")
+
+    def __init__(self, newest, keys=()):
+        self.newest = newest
+        self.keys = frozenset(keys)
+
+    def is_new(self, review):
+        date = review.get("date_created") or ""
+        return date > self.newest or (date == self.newest and review_key(review) not in self.keys)
+
+    # * A fetch bounded by self returned everything a product bounded by `other` still needs
+    def covers(self, other):
+        return other is not None and self.newest <= other.newest
+
+
+# * Per-product review sync state: newest saved date_created, the review keys at that date and how
+# * many review files exist. Saved atomically as gzipped JSON next to the product index.
+class ReviewSyncState:
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.entries = {}
+        self.loaded = False
+        self.dirty = False
+        self._lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._snapshots = 0
+        self._written = 0  # * Number of the newest snapshot on disk
+
+    def _load(self):
+        try:
+            with open(self.filepath, "rb") as file:
+                return json.loads(gzip.decompress(file.read()))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            log_info(f"Ignoring unreadable review state {self.filepath}: {e}")
+            return {}
+
+    async def load(self):
+        async with self._lock:
+            if not self.loaded:
+                loop = asyncio.get_running_loop()
+                self.entries = await loop.run_in_executor(None, self._load)
+                self.loaded = True
+                log_debug(f"Loaded review state for {len(self.entries)} products from {self.filepath}")
+
+    def since(self, handle):
+        entry = self.entries.get(handle)
+        if not entry or not entry.get("newest"):
+            return None
+        return Since(entry["newest"], entry.get("keys", ()))
+
+    # * Oldest bound of a group of products; None (full history) if any of them was never synced
+    def group_since(self, handles):
+        bounds = [self.since(handle) for handle in handles]
+        if not bounds or any(bound is None for bound in bounds):
+            return None
+        return min(bounds, key=lambda bound: bound.newest)
+
+    def count(self, handle):
+        return self.entries.get(handle, {}).get("count", 0)
+
+    def update(self, handle, reviews, replace=False):
+        entry = self.entries.setdefault(handle, {"newest": None, "keys": [], "count": 0})
+        entry["count"] = len(reviews) if replace else entry["count"] + len(reviews)
+        for review in reviews:
+            date = review.get("date_created") or ""
+            if entry["newest"] is None or date > entry["newest"]:
+                entry["newest"] = date
+                entry["keys"] = [review_key(review)]
+            elif date == entry["newest"]:
+                key = review_key(review)
+                if key not in entry["keys"]:
+                    entry["keys"].append(key)
+        self.dirty = True
+
+    def _save(self, entries):
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        tmp_path = f"{self.filepath}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(gzip.compress(json.dumps(entries, separators=(",", ":")).encode("utf-8")))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.filepath)
+
+    # * Copy of the entries taken on the loop (None if nothing changed since the last one), numbered
+    # * so that an older snapshot written late never replaces a newer one
+    def snapshot(self):
+        if not self.dirty:
+            return None
+        self.dirty = False
+        self._snapshots += 1
+        entries = {handle: dict(entry, keys=list(entry["keys"])) for handle, entry in self.entries.items()}
+        return self._snapshots, entries
+
+    async def write(self, snapshot):
+        if snapshot is None:
+            return
+        number, entries = snapshot
+        async with self._write_lock:
+            if number <= self._written:
+                return
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._save, entries)
+            self._written = number
+        log_debug(f"Review state saved to {self.filepath}")
+
+    async def save(self):
+        await self.write(self.snapshot())
@@ -5,21 +5,30 @@ import json
 import logging
 import aiofiles
 import aiohttp
-import sys
-import time
-import threading
 import shutil
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from timeit import default_timer as timer
 import signal
 import gzip
+import hashlib
 import asyncio
+from collections.abc import MutableMapping
+from urllib.parse import urlparse
+
+try:
+    import orjson  # ? Optional: several times faster than json for large product payloads
+except ImportError:
+    orjson = None
 
 # ! Custom exception for graceful shutdown
 class ScrapeInterrupted(Exception):
     pass
 
 
+# ! A listing failed partway through: what was crawled is saved and checkpointed, but the store isn't done
+class IncompleteCrawl(Exception):
+    pass
+
+
 # * Setup logging as a single function
 def setup_logging(log_dir="data", log_filename="scrape_log.json"):
     os.makedirs(log_dir, exist_ok=True)
@@ -35,65 +44,45 @@ def setup_logging(log_dir="data", log_filename="scrape_log.json"):
     logger = logging.getLogger()
     logger.setLevel(logging.DEBUG)
 
-    # ? Suppress console logs
+    # ? Suppress console logs (FileHandler subclasses StreamHandler, so match the exact type)
     logger.handlers = [
-        h for h in logger.handlers if not isinstance(h, logging.StreamHandler)
+        h for h in logger.handlers if type(h) is not logging.StreamHandler
     ]
 
     return logger  # * Return logger object
 
 
 # * Initialize logger and store logging functions in one object
-log = setup_logging()
-
-# * Terminal-based loading animation and progress counter
-def terminal_progress_control(
-    products_count,
-    reviews_count,
-    stop_event,
-    show_reviews=True,
-    show_products=True,
-    update_delay=0.5,
-):
-    loading_chars = "|/-\\"
-    idx = 0
-    start_time = timer()
+# ? Queue workers started by main.py set SCRAPE_LOG_FILE so parallel processes don't share one log
+log = setup_logging(log_filename=os.environ.get("SCRAPE_LOG_FILE", "scrape_log.json"))
+
+
+# * Shorthand logging helpers used across the scrapers
+def log_info(message):
+    log.info(message)
 
-    while not stop_event.is_set():
-        status_line = (
-            f"\r{loading_chars[idx % len(loading_chars)]} Scraping in progress..."
-        )
-        idx += 1
-
-        # * Combine product and review counts into one string
-        if show_products:
-            status_line += f" Products Scraped: {products_count[0]}"
-        if show_reviews:
-            status_line += f" Reviews Scraped: {reviews_count[0]}"
-
-        # * Only flush once after writing the status
-        sys.stdout.write(status_line)
-        sys.stdout.flush()
-        time.sleep(update_delay)
-
-    # * Final status after scraping finishes
-    elapsed_time = timer() - start_time
-    sys.stdout.write(
-        f"\rFinished! Scraping took {elapsed_time:.2f} seconds. {' ' * 50}\n"
-    )
-    sys.stdout.flush()
 
+def log_debug(message):
+    log.debug(message)
 
-# * Asynchronous function to save data to a file with error handling
-async def save_data(filepath, data):
+# * Compact UTF-8 JSON bytes; uses orjson when it is installed
+def dump_json_bytes(data):
+    if orjson is not None:
+        try:
+            return orjson.dumps(data)
+        except TypeError:
+            pass  # ? e.g. non-str dict keys or ints beyond 64 bits; the stdlib handles those
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# * Asynchronous function to save data to a file with error handling (unbatched fallback path)
+async def save_data(filepath, data, compresslevel=6):
     try:
         os.makedirs(
             os.path.dirname(filepath), exist_ok=True
         )  # * Centralized directory creation
         async with aiofiles.open(filepath, "wb") as file:
-            compressed_data = gzip.compress(
-                json.dumps(data, ensure_ascii=False, indent=4).encode("utf-8")
-            )
+            compressed_data = gzip.compress(dump_json_bytes(data), compresslevel=compresslevel)
             await file.write(compressed_data)
     except (OSError, IOError) as e:
         log.error(f"Failed to save data to {filepath}: {e}")
@@ -105,24 +94,178 @@ async def save_data_generic(data, folder, filename):
     await save_data(file_path, data)
 
 
+# * Namespace key for a store, derived from its domain (e.g. "www.vapeshop.co.uk")
+def store_key(store_url):
+    parsed = urlparse(store_url if "://" in store_url else f"https://{store_url}")
+    return parsed.netloc.lower().replace(":", "_") or "default"
+
+
+# * Per-store folder holding that store's index, state and Products tree
+def store_data_dir(store_url, base_dir="data"):
+    return os.path.join(base_dir, "stores", store_key(store_url))
+
+
+# * Save a single product under its own folder
+# * With a writer (src.writer.BatchWriter) the file joins the current batch instead of being written now
+async def save_product_data(product, product_handle, products_dir="data/Products", writer=None):
+    if writer is not None:
+        await writer.write(os.path.join(products_dir, product_handle, "product.json.gz"), product)
+        return
+    await save_data_generic(product, os.path.join(products_dir, product_handle), "product.json.gz")
+
+
+# * Save each review as its own file inside the product folder
+async def save_review_data(reviews, product_handle, products_dir="data/Products", writer=None, start=1):
+    for idx, review in enumerate(reviews, start):
+        if writer is not None:
+            await writer.write(os.path.join(products_dir, product_handle, "reviews", f"review_{idx}.json.gz"), review)
+            continue
+        await save_data_generic(
+            review, os.path.join(products_dir, product_handle, "reviews"), f"review_{idx}.json.gz"
+        )
+
+
+# * Append-only index of scraped product handles.
+# * Every new handle is one journal line (O(1) per product); the gzipped snapshot is
+# * only rewritten on compaction, once the journal outgrows the snapshot.
+# * Lines are queued in memory on the event loop; save() writes, fsyncs and compacts in a worker thread.
+class ProductIndex(MutableMapping):
+    def __init__(self, filepath="data/product_list.json.gz", compact_min=1000):
+        self.filepath = filepath
+        self.journal_path = f"{filepath[:-len('.json.gz')] if filepath.endswith('.json.gz') else filepath}.journal.jsonl"
+        self.compact_min = compact_min
+        self._entries = {}
+        self._journal = None  # ! Only touched by _write, which runs one at a time (see save)
+        self._journal_lines = 0
+        self._pending = []  # * Journal lines not written yet
+        self._lock = asyncio.Lock()
+
+    def __getitem__(self, handle):
+        return self._entries[handle]
+
+    def __setitem__(self, handle, value):
+        self._entries[handle] = value
+        self._append(handle, value)
+
+    def __delitem__(self, handle):
+        del self._entries[handle]
+        self._append(handle, None, deleted=True)
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, handle):
+        return handle in self._entries
+
+    def load(self):
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "rb") as file:
+                    self._entries = json.loads(gzip.decompress(file.read()).decode("utf-8")) or {}
+            except (OSError, IOError, EOFError, json.JSONDecodeError) as e:
+                log.error(f"Error loading scraped products: {e}")
+                self._entries = {}
+        # * Replay the journal on top of the snapshot; a torn last line from a crash is skipped
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as journal:
+                for line in journal:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        log.warning(f"Skipping corrupt line in {self.journal_path}")
+                        continue
+                    if entry.get("deleted"):
+                        self._entries.pop(entry["handle"], None)
+                    else:
+                        self._entries[entry["handle"]] = entry["value"]
+                    self._journal_lines += 1
+        return self
+
+    def _append(self, handle, value, deleted=False):
+        entry = {"handle": handle, "deleted": True} if deleted else {"handle": handle, "value": value}
+        self._pending.append(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._journal_lines += 1
+
+    # * Takes the queued lines and, when the journal has outgrown the snapshot, a copy of the entries
+    # * to compact; copied here so the worker thread never sees the dict mid-update
+    def _take(self):
+        lines, self._pending = self._pending, []
+        snapshot = None
+        if self._journal_lines >= max(self.compact_min, len(self._entries)):
+            snapshot = dict(self._entries)
+            self._journal_lines = 0
+        return lines, snapshot
+
+    # ! Blocking: journal append + fsync, then the optional compaction
+    def _write(self, lines, snapshot):
+        if lines:
+            if self._journal is None:
+                os.makedirs(os.path.dirname(self.journal_path) or ".", exist_ok=True)
+                self._journal = open(self.journal_path, "a", encoding="utf-8")
+            self._journal.write("".join(lines))
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+        if snapshot is not None:
+            self.compact(snapshot)
+
+    # * Make appended entries durable, off the event loop
+    async def save(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write, *self._take())
+
+    # * Blocking variant for callers without a loop
+    def flush(self):
+        self._write(*self._take())
+
+    # * Fold the journal into a fresh snapshot (written atomically) and truncate the journal.
+    # * `entries` already includes every journal line written so far.
+    def compact(self, entries=None):
+        entries = dict(self._entries) if entries is None else entries
+        os.makedirs(os.path.dirname(self.filepath) or ".", exist_ok=True)
+        tmp_path = f"{self.filepath}.tmp"
+        with open(tmp_path, "wb") as file:
+            file.write(
+                gzip.compress(
+                    json.dumps(entries, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+                )
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.filepath)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+        log.info(f"Compacted {self.filepath} with {len(entries)} products.")
+
+    # * Writes what is left and releases the journal file handle (reopened by the next write)
+    async def close(self):
+        await self.save()
+        async with self._lock:
+            if self._journal is not None:
+                self._journal.close()
+                self._journal = None
+
+
 # * Load previously scraped products to avoid duplicates
 async def load_scraped_products(filepath="data/product_list.json.gz"):
-    if os.path.exists(filepath):
-        try:
-            async with aiofiles.open(filepath, "rb") as file:
-                compressed_content = await file.read()
-                content = gzip.decompress(compressed_content).decode("utf-8")
-                return (
-                    json.loads(content) or {}
-                )  # * Load the JSON content, return empty dict if invalid
-        except (OSError, IOError, json.JSONDecodeError) as e:
-            log.error(f"Error loading scraped products: {e}")
-            return {}
-    return {}
-
-
-# * Save scraped products to avoid duplicates
-async def save_scraped_products(scraped_products, filepath="data/product_list.json.gz"):
+    index = ProductIndex(filepath)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, index.load)
+
+
+# * Persist scraped products: journal fsync for an index, full rewrite for a plain dict.
+# * close=True also releases the index's journal file handle (at the end of a crawl).
+async def save_scraped_products(scraped_products, filepath="data/product_list.json.gz", close=False):
+    if isinstance(scraped_products, ProductIndex):
+        await (scraped_products.close() if close else scraped_products.save())
+        log.info(f"Flushed product index with {len(scraped_products)} products.")
+        return
     await save_data(filepath, scraped_products)
     log.info(f"Updated product_list.json.gz with {len(scraped_products)} products.")
 
@@ -135,75 +278,86 @@ def is_duplicate(product_handle, scraped_products):
     return False
 
 
-# * Batch Save for Efficiency with optimized duplicate check
-async def batch_save_products(batch, scraped_products, batch_size=25):
-    new_products = set()  # * Use set for faster lookups
+# * Delta mode: a product is only skipped if its listing updated_at matches the index entry
+def is_unchanged(product, scraped_products):
+    entry = scraped_products.get(product.get("handle"))
+    if not isinstance(entry, dict) or entry.get("updated_at") is None:
+        return False  # Legacy title-only entries carry no timestamp, so they are re-checked once
+    return entry["updated_at"] == product.get("updated_at")
 
-    for product in batch:
-        product_handle = product["handle"]
 
-        if product_handle not in scraped_products:
-            await save_data_generic(
-                product, f"data/Products/{product_handle}", "product.json.gz"
-            )
-            new_products.add(product_handle)
-        else:
-            log.info(f"Duplicate skipped for {product_handle}")
+# * Stable hash of a formatted product, used to skip rewriting unchanged records.
+# * updated_at is left out so a bumped timestamp alone doesn't count as a change.
+def content_hash(data, exclude=("updated_at",)):
+    content = {key: value for key, value in data.items() if key not in exclude}
+    return hashlib.sha1(
+        json.dumps(content, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    ).hexdigest()
 
-    if new_products:
-        scraped_products.update({handle: True for handle in new_products})
-        await save_scraped_products(scraped_products)
 
-    batch.clear()
+# * Batch save for efficiency: one page of products goes through the writer and is flushed
+# * (compressed off the loop, one sync) before the caller records the handles in the index
+async def batch_save_products(products, products_dir, writer):
+    for product in products:
+        await save_product_data(product, product["handle"], products_dir, writer)
+    await writer.flush()
 
 
-# ! Asynchronous function to fetch a URL with retry mechanism
-async def fetch_url(session, url, retries=3, delay=1):
-    for attempt in range(retries):
-        try:
-            async with session.get(url) as response:
-                response.raise_for_status()  # ! Raise an exception for bad status codes
-                return await response.text()  # * Return the response body as text
-        except aiohttp.ClientError as e:
-            if attempt < retries - 1:
-                log.warning(
-                    f"Error fetching {url}, retrying ({attempt + 1}/{retries}): {e}"
-                )
-                await asyncio.sleep(delay)
-                delay *= 2  # * Exponential backoff
-            else:
-                log.error(f"Failed to fetch {url} after {retries} retries: {e}")
-                return None
+# * asyncio.gather that cancels the other tasks (and waits for them) as soon as one fails, then re-raises.
+# ! A plain gather leaves them running after a failed store has closed its index and stopped its pipeline
+async def gather_or_cancel(*aws):
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
 
 
-# * Function to track progress during scraping
+# ! Fetch a URL as text through the shared HTTPClient (retries, backoff and rate limiting live there)
+async def fetch_url(client, url):
+    try:
+        response = await client.get(url)
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        log.error(f"Failed to fetch {url}: {e}")
+        return None
+    if response.status != 200:
+        log.error(f"Failed to fetch {url}: status {response.status}")
+        return None
+    return response.text()  # * Return the response body as text
+
+
+# * Function to track progress during scraping: every reporter gets a metrics snapshot per interval
 async def track_progress_during_scraping(
     scraping_future,
-    products_scraped,
-    reviews_scraped,
-    show_reviews=True,
-    show_products=True,
+    metrics,
+    reporters,
+    update_delay=0.5,
 ):
-    stop_event = threading.Event()
-    animation_thread = threading.Thread(
-        target=terminal_progress_control,
-        args=(
-            products_scraped,
-            reviews_scraped,
-            stop_event,
-            show_reviews,
-            show_products,
-        ),
-    )
+    for reporter in reporters:
+        await reporter.start(metrics)
 
-    # * Start the animation
-    animation_thread.start()
+    async def report_loop():
+        while True:
+            snapshot = metrics.snapshot()
+            for reporter in reporters:
+                await reporter.report(snapshot)
+            await asyncio.sleep(update_delay)
 
+    report_task = asyncio.ensure_future(report_loop())
     try:
         await scraping_future  # Ensure this is an awaitable future
     finally:
-        stop_event.set()
-        animation_thread.join()  # * Wait for the animation to stop
+        report_task.cancel()
+        try:
+            await report_task
+        except asyncio.CancelledError:
+            pass
+        snapshot = metrics.snapshot()
+        for reporter in reporters:
+            await reporter.stop(snapshot)
 
 
 # * Function to zip the 'Products' folder after scraping
@@ -0,0 +1,231 @@
+## ProductScrape/src/workqueue.py
+
+import asyncio
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from src.utils import log_info, log_debug, store_key
+
+# * Job states; a running job whose lease expired is claimable again (its worker died or hung)
+PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+
+
+# * Unique per process and readable in the queue: host, pid and a short random suffix
+def make_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+
+# * Shared store queue in one SQLite file. Any number of worker processes (on this host, or on
+# * others through a shared volume with working POSIX locks) claim stores under a lease, renew it
+# * with heartbeats and mark the store done or failed. A worker that crashes simply stops renewing,
+# * and its store goes back to whoever claims next. Lease times use the wall clock of each host.
+class WorkQueue:
+    def __init__(self, filepath, lease_seconds=120.0, max_attempts=3):
+        self.filepath = filepath
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+        with self._connect() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS jobs ("
+                " key TEXT PRIMARY KEY, store_url TEXT NOT NULL, status TEXT NOT NULL,"
+                " owner TEXT, lease_until REAL, attempts INTEGER NOT NULL DEFAULT 0,"
+                " error TEXT, updated REAL NOT NULL)"
+            )
+            connection.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, lease_until)")
+
+    # ? One short-lived connection per call: safe from any thread, nothing to share across processes
+    def _connect(self):
+        connection = sqlite3.connect(self.filepath, timeout=30.0, isolation_level=None)
+        connection.execute("PRAGMA busy_timeout = 30000")
+        return _Transaction(connection)
+
+    # * Coordinator: add stores; existing ones are left alone unless `requeue` (then done/failed run again)
+    def enqueue(self, store_urls, requeue=False):
+        now = time.time()
+        added = 0
+        with self._connect() as connection:
+            for store_url in store_urls:
+                cursor = connection.execute(
+                    "INSERT OR IGNORE INTO jobs (key, store_url, status, attempts, updated) VALUES (?, ?, ?, 0, ?)",
+                    (store_key(store_url), store_url, PENDING, now),
+                )
+                if cursor.rowcount:
+                    added += 1
+                elif requeue:
+                    connection.execute(
+                        "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, attempts = 0, error = NULL,"
+                        " updated = ? WHERE key = ? AND status IN (?, ?)",
+                        (PENDING, now, store_key(store_url), DONE, FAILED),
+                    )
+        log_info(f"Enqueued {added} new stores into {self.filepath}")
+        return added
+
+    # * Next pending store (or one whose lease expired) for `worker_id`; None when nothing is claimable.
+    # * Returns (store_url, attempt); attempt > 1 means an earlier worker stopped partway through.
+    def claim(self, worker_id):
+        now = time.time()
+        with self._connect() as connection:
+            # ! A job out of attempts is failed here instead of being handed out again
+            connection.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, error = COALESCE(error, 'lease expired'), updated = ?"
+                " WHERE status = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, now, RUNNING, now, self.max_attempts),
+            )
+            row = connection.execute(
+                "SELECT key, store_url, attempts FROM jobs"
+                " WHERE status = ? OR (status = ? AND lease_until < ?) ORDER BY updated LIMIT 1",
+                (PENDING, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                return None
+            key, store_url, attempts = row
+            connection.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_until = ?, attempts = ?, updated = ? WHERE key = ?",
+                (RUNNING, worker_id, now + self.lease_seconds, attempts + 1, now, key),
+            )
+        log_debug(f"{worker_id} claimed {store_url} (attempt {attempts + 1})")
+        return store_url, attempts + 1
+
+    # * Extend the lease; False means the lease was lost (expired and reclaimed) and the work must stop
+    def heartbeat(self, store_url, worker_id):
+        now = time.time()
+        with self._connect() as connection:
+            cursor = connection.execute(
+                "UPDATE jobs SET lease_until = ?, updated = ? WHERE key = ? AND owner = ? AND status = ?",
+                (now + self.lease_seconds, now, store_key(store_url), worker_id, RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def complete(self, store_url, worker_id):
+        return self._finish(store_url, worker_id, DONE, None)
+
+    # * Failed attempts go back to pending until max_attempts is used up
+    def fail(self, store_url, worker_id, error):
+        return self._finish(store_url, worker_id, None, str(error)[:1000])
+
+    # * Graceful shutdown: hand the store back without spending an attempt
+    def release(self, store_url, worker_id):
+        with self._connect() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, attempts = MAX(attempts - 1, 0),"
+                " updated = ? WHERE key = ? AND owner = ? AND status = ?",
+                (PENDING, time.time(), store_key(store_url), worker_id, RUNNING),
+            )
+
+    def _finish(self, store_url, worker_id, status, error):
+        with self._connect() as connection:
+            if status is None:
+                attempts = connection.execute(
+                    "SELECT attempts FROM jobs WHERE key = ?", (store_key(store_url),)
+                ).fetchone()
+                status = FAILED if attempts and attempts[0] >= self.max_attempts else PENDING
+            cursor = connection.execute(
+                "UPDATE jobs SET status = ?, owner = NULL, lease_until = NULL, error = ?, updated = ?"
+                " WHERE key = ? AND owner = ? AND status = ?",
+                (status, error, time.time(), store_key(store_url), worker_id, RUNNING),
+            )
+            return cursor.rowcount == 1
+
+    def counts(self):
+        with self._connect() as connection:
+            rows = connection.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def failures(self):
+        with self._connect() as connection:
+            return connection.execute(
+                "SELECT store_url, attempts, error FROM jobs WHERE status = ? ORDER BY store_url", (FAILED,)
+            ).fetchall()
+
+
+# * BEGIN IMMEDIATE ... COMMIT around a connection: takes the write lock up front, so two workers
+# * can never read the same pending row and both claim it
+class _Transaction:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc, traceback):
+        try:
+            self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.connection.close()
+
+
+# * Worker side: claims stores and runs `process(store_url, attempt)` with up to `concurrency` stores
+# * at once. Each store gets a heartbeat task; if the lease is lost the store is cancelled, since
+# * another worker now owns its folder. Blocking SQLite calls run in the default executor.
+class QueueWorker:
+    def __init__(self, queue, process, worker_id=None, concurrency=4, heartbeat_interval=None, idle_exit=True,
+                 poll_interval=5.0):
+        self.queue = queue
+        self.process = process
+        # * main.py names each local worker (and its log file) up front and passes the id down
+        self.worker_id = worker_id or os.environ.get("SCRAPE_WORKER_ID") or make_worker_id()
+        self.concurrency = concurrency
+        self.heartbeat_interval = heartbeat_interval or max(1.0, queue.lease_seconds / 3)
+        self.idle_exit = idle_exit  # * Stop once nothing is claimable (otherwise poll for new stores)
+        self.poll_interval = poll_interval
+        self.completed = 0
+        self.failed = 0
+
+    async def _call(self, method, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, method, *args)
+
+    async def run(self):
+        log_info(f"Worker {self.worker_id} joined {self.queue.filepath}")
+        await asyncio.gather(*(self.slot() for _ in range(max(1, self.concurrency))))
+        log_info(f"Worker {self.worker_id} finished: {self.completed} stores done, {self.failed} failed")
+
+    async def slot(self):
+        while True:
+            claimed = await self._call(self.queue.claim, self.worker_id)
+            if claimed is None:
+                if self.idle_exit:
+                    return
+                await asyncio.sleep(self.poll_interval)
+                continue
+            await self.run_store(*claimed)
+
+    async def run_store(self, store_url, attempt):
+        work = asyncio.ensure_future(self.process(store_url, attempt))
+        heartbeat = asyncio.ensure_future(self.keep_lease(store_url, work))
+        try:
+            await work
+        except asyncio.CancelledError:
+            if heartbeat.done() and not heartbeat.cancelled() and heartbeat.result() is False:
+                log_info(f"Lease on {store_url} lost; stopped working on it")
+                return
+            # ! Shutdown: give the store back so another worker picks it up right away
+            await asyncio.shield(self._call(self.queue.release, store_url, self.worker_id))
+            raise
+        except Exception as e:
+            self.failed += 1
+            log_info(f"Scraping {store_url} failed (attempt {attempt}): {e!r}")
+            await self._call(self.queue.fail, store_url, self.worker_id, repr(e))
+        else:
+            self.completed += 1
+            await self._call(self.queue.complete, store_url, self.worker_id)
+        finally:
+            heartbeat.cancel()
+
+    # * Renews the lease until the work ends; returns False (and cancels the work) if it was lost
+    async def keep_lease(self, store_url, work):
+        while not work.done():
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                if not await self._call(self.queue.heartbeat, store_url, self.worker_id):
+                    work.cancel()
+                    return False
+            except sqlite3.Error as e:
+                log_debug(f"Heartbeat for {store_url} failed, retrying: {e}")
+        return True
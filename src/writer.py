@@ -0,0 +1,128 @@
+## ProductScrape/src/writer.py
+
+import asyncio
+import gzip
+import os
+from timeit import default_timer as timer
+from src.utils import log_info, log_debug, dump_json_bytes
+
+
+# * Batched file writer for product/review files.
+# * write() only queues the record; every `batch_size` records the whole batch is serialized,
+# * gzipped and written in a worker thread, then the batch's files (and new folders) are fsynced.
+# * Callers block on a full batch, so a slow disk throttles the scrapers instead of piling up memory.
+class BatchWriter:
+    def __init__(self, batch_size=64, compresslevel=6, fsync=True):
+        self.batch_size = max(1, batch_size)
+        self.compresslevel = compresslevel
+        self.fsync = fsync
+        self.pending = []
+        self._lock = asyncio.Lock()  # * One batch on disk at a time, so later writes of a path win
+        self._dirs = set()  # * Folders already created, to skip repeated makedirs calls
+        # * Called on the loop as each batch is taken; a returned coroutine function is awaited once the
+        # * batch is on disk. Lets callers persist state that covers exactly the files queued so far.
+        self.flush_hooks = []
+        # * Stats
+        self.files = 0
+        self.batches = 0
+        self.failed = 0
+        self.sync_errors = 0
+        self.raw_bytes = 0
+        self.written_bytes = 0
+        self.seconds = 0.0
+
+    async def write(self, filepath, data):
+        self.pending.append((filepath, data))
+        if len(self.pending) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self):
+        async with self._lock:
+            if not self.pending:
+                return
+            batch, self.pending = self.pending, []
+            after = [hook() for hook in self.flush_hooks]
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_batch, batch)
+            for persist in after:
+                if persist is not None:
+                    await persist()
+
+    # ! Runs in a worker thread: serialization, compression and disk I/O never touch the event loop
+    def _write_batch(self, batch):
+        start = timer()
+        written = []
+        new_dirs = []
+        for filepath, data in batch:
+            try:
+                folder = os.path.dirname(filepath)
+                if folder not in self._dirs:
+                    new_dirs.extend(self._makedirs(folder))
+                    self._dirs.add(folder)
+                raw = dump_json_bytes(data)
+                body = gzip.compress(raw, compresslevel=self.compresslevel)
+                with open(filepath, "wb") as file:
+                    file.write(body)
+            except (OSError, TypeError, ValueError) as e:
+                self.failed += 1
+                log_info(f"Failed to save data to {filepath}: {e}")
+                continue
+            written.append(filepath)
+            self.files += 1
+            self.raw_bytes += len(raw)
+            self.written_bytes += len(body)
+        if self.fsync:
+            self._sync(written, new_dirs)
+        self.batches += 1
+        self.seconds += timer() - start
+        log_debug(f"Wrote batch of {len(batch)} files in {timer() - start:.3f}s")
+
+    # * Creates `folder` and returns the folders that did not exist before, outermost first
+    def _makedirs(self, folder):
+        missing = []
+        while folder and not os.path.isdir(folder):
+            missing.append(folder)
+            folder = os.path.dirname(folder)
+        if missing:
+            os.makedirs(missing[0], exist_ok=True)
+        return missing[::-1]
+
+    # * Only this batch's files, then the folders whose entries changed (each file's folder and the
+    # * parents of folders created for the batch); all written before the first fsync, so the disk
+    # * can flush them together
+    def _sync(self, written, new_dirs):
+        for filepath in written:
+            self._fsync(filepath, os.O_RDWR)
+        if os.name == "nt":
+            return  # ? Windows can't open a folder to fsync it
+        folders = {os.path.dirname(filepath) for filepath in written}
+        folders.update(os.path.dirname(folder) for folder in new_dirs)
+        for folder in folders:
+            self._fsync(folder or ".", os.O_RDONLY)
+
+    def _fsync(self, path, flags):
+        try:
+            fd = os.open(path, flags)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError as e:
+            self.sync_errors += 1
+            log_info(f"Failed to sync {path}: {e}")
+
+    def stats(self):
+        return {
+            "files": self.files,
+            "batches": self.batches,
+            "failed": self.failed,
+            "sync_errors": self.sync_errors,
+            "raw_bytes": self.raw_bytes,
+            "written_bytes": self.written_bytes,
+            "seconds": round(self.seconds, 2),
+            "files_per_second": round(self.files / self.seconds, 1) if self.seconds else 0.0,
+        }
+
+    async def close(self):
+        await self.flush()
+        log_info(f"Writer stats: {self.stats()}")